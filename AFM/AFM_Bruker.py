@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Reader of the Bruker Nanoscope files (.001, .002...) without pySPM
+
+The text header is read and parsed once when the file is opened. The data of a channel
+is not read: BrukerChannel is a view of the file on the disk (np.memmap) and the
+scaling to physical units (nm for the height) is applied to the lines asked for.
+The values and the size are the same as with pySPM:
+    pySPM.Bruker(filename).get_channel(channel).pixels  ->  BrukerFile(filename).get_channel(channel).pixels
+    imageSPM.size  ->  channel.size
+"""
+
+import re
+import numpy as np
+
+def read_header(filename, chunk_size=65536):
+    """
+    read the text header of a Bruker file (until \\*File list end)
+    output : list of (section, dictionary of the parameters), for example
+             ('Ciao image list', {'Data offset': '40960', ..., '@2:Image Data': 'S [ZSensor] "Height Sensor"'})
+    """
+    header = b''
+    with open(filename, 'rb') as file:
+        while b'\\*File list end' not in header:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise ValueError(filename+' is not a Bruker file (no *File list end)')
+            header += chunk
+    header = header[:header.index(b'\\*File list end')].decode('latin1')
+    sections = []
+    for line in header.splitlines():
+        line = line.strip().lstrip('\\')
+        if line.startswith('*'):
+            sections.append((line[1:], {}))
+        elif ': ' in line and sections:
+            key, value = line.split(': ', 1)
+            sections[-1][1][key] = value.strip()
+    return sections
+
+def scale_value(parameter):
+    """
+    value and unit of a scale parameter of the header
+    for example 'V [Sens. ZsensSens] (0.0003750000 V/LSB) 24.57563 V' -> ('Sens. ZsensSens', 24.57563, 'V')
+    output : (name of the sensitivity or None, value, unit)
+    """
+    result = re.match(r'[A-Z]+\s+(?:\[([^]]+)\]\s+)?\(-?[0-9.e+-]+ .*?\)\s+(-?[0-9.e+-]+)\s*(.*)$', parameter)
+    if result is None:
+        raise ValueError('unknown scale: '+parameter)
+    return result.group(1), float(result.group(2)), result.group(3)
+
+class BrukerChannel:
+    """
+    one channel of a Bruker file, read from the disk only when its lines are asked for
+    attributes : channel (name), direction ('Trace' or 'Retrace'), raw (np.memmap of the
+                 integers of the file), scale (V per integer), sensitivity (unit per V), zscale (unit),
+                 size (same as size of pySPM.SPM_image: {'pixels': {'x', 'y'}, 'real': {'x', 'y', 'unit'}})
+    channel[rows] gives the lines rows in physical units, channel.pixels the whole image
+    """
+    def __init__(self, filename, parameters, scanner):
+        self.filename = filename
+        self.parameters = parameters
+        self.channel = re.search(r'"([^"]*)"', parameters['@2:Image Data']).group(1)
+        self.direction = parameters.get('Line Direction', 'Trace')
+        xres = int(parameters.get('Valid data len X', parameters['Samps/line']))
+        yres = int(parameters.get('Valid data len Y', parameters['Number of lines']))
+        bpp = int(parameters.get('Bytes/pixel', int(parameters['Data length']) // (xres*yres)))
+        self.raw = np.memmap(filename, dtype='<i'+str(bpp), mode='r',
+                             offset=int(parameters['Data offset']), shape=(yres, xres))
+        #physical value of an integer: Z scale (V) / 2**(8*bpp) * sensitivity (unit/V)
+        sensitivity, value, unit = scale_value(parameters['@2:Z scale'])
+        if sensitivity is None:
+            self.scale = value / 65536.
+            self.sensitivity = 1
+            self.zscale = 'V'
+        else:
+            words = scanner['@'+sensitivity].split()
+            self.scale = value / 256**bpp
+            self.sensitivity = float(words[1])
+            self.zscale = (words[2] if len(words) > 2 else words[0]).replace('/V', '')
+        scan_size = parameters['Scan Size'].split()
+        self.size = {'pixels': {'x': xres, 'y': yres},
+                     'real': {'x': float(scan_size[0]), 'y': float(scan_size[1]) * yres / xres,
+                              'unit': scan_size[2].replace('~', 'u')}}
+
+    @property
+    def shape(self):
+        return self.raw.shape
+
+    def __len__(self):
+        return self.raw.shape[0]
+
+    def __getitem__(self, index):
+        return self.raw[index] * self.scale * self.sensitivity
+
+    def __array__(self, dtype=None, copy=None):
+        return self.pixels if dtype is None else self.pixels.astype(dtype)
+
+    @property
+    def pixels(self):
+        """
+        the whole image in physical units (float64, read from the disk at each call)
+        """
+        return self.raw * self.scale * self.sensitivity
+
+class BrukerFile:
+    """
+    Bruker Nanoscope file, the header is parsed once
+    input : filename
+    attributes : sections: see read_header, scanner: parameters of the sections other than images,
+                 channels: list of (name, direction) of the images of the file
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.sections = read_header(filename)
+        #sensitivities of the scanner (Scanner list and the following sections)
+        self.scanner = {}
+        for section, parameters in self.sections:
+            if section != 'Ciao image list':
+                for key, value in parameters.items():
+                    self.scanner.setdefault(key, value)
+        self.images = [parameters for section, parameters in self.sections
+                       if section == 'Ciao image list' and '@2:Image Data' in parameters]
+        self.channels = [(re.search(r'"([^"]*)"', parameters['@2:Image Data']).group(1),
+                          parameters.get('Line Direction', 'Trace')) for parameters in self.images]
+
+    def list_channels(self):
+        """
+        print the names of the channels (as pySPM.Bruker.list_channels)
+        """
+        print("Channels")
+        print("========")
+        for name, direction in self.channels:
+            print(name+' ('+direction+')')
+
+    def get_channel(self, channel="Height Sensor", backward=False):
+        """
+        a channel of the file (the other direction if the one asked for is not in the file)
+        input : name of the channel, backward: False = Trace, True = Retrace
+        output : BrukerChannel
+        """
+        for direction in [backward, not backward]:
+            for (name, line_direction), parameters in zip(self.channels, self.images):
+                if name == channel and (line_direction == 'Retrace') == direction:
+                    return BrukerChannel(self.filename, parameters, self.scanner)
+        raise KeyError('channel '+channel+' not found in '+self.filename)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Cache on the disk of the stages of the analysis of AFM scans (see analyse_scan in AFM_Functions.py)
+
+The result of each stage (flattened picture, regions of the holes, table of the properties)
+is saved in a NPZ file named by a key. The key of a stage is a hash of the key of the stage
+before (the first one: the content of the scan file), of the parameters of the stage and of
+the source code of its functions: changing a parameter of a stage (or its code) computes this
+stage and the next ones again, the stages before are read from the cache.
+The size of the cache is bounded: the least recently used results are removed first.
+"""
+
+import os
+import glob
+import hashlib
+import inspect
+import zipfile
+import tempfile
+import numpy as np
+
+def file_hash(filename, chunk_size=2**20):
+    """
+    hash of the content of a file (SHA-1, hexadecimal)
+    """
+    sha = hashlib.sha1()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def code_version(*objects):
+    """
+    hash of the source code of functions, classes or modules: changes when their code changes
+    """
+    sha = hashlib.sha1()
+    for obj in objects:
+        sha.update(inspect.getsource(obj).encode('utf-8'))
+    return sha.hexdigest()
+
+def normalize(part):
+    """
+    representation of a part of a key that does not depend on the order of the dictionaries
+    """
+    if isinstance(part, dict):
+        return tuple((key, normalize(value)) for key, value in sorted(part.items()))
+    if isinstance(part, (list, tuple)):
+        return tuple(normalize(value) for value in part)
+    return part
+
+class StageCache:
+    """
+    cache of results (dictionaries of arrays) on the disk, bounded in size
+    input : folder of the cache (None = AFM_cache in the temporary folder of the system),
+            max_size: maximum size of the cache in bytes
+    it can be used by several processes at the same time (see AFM_batch.py)
+    """
+    def __init__(self, folder=None, max_size=2**30):
+        if folder is None:
+            folder = os.path.join(tempfile.gettempdir(), 'AFM_cache')
+        self.folder = folder
+        self.max_size = max_size
+        os.makedirs(folder, exist_ok=True)
+
+    def key(self, *parts):
+        """
+        key of a result from the things it depends on (keys of other stages, hashes, parameters)
+        """
+        return hashlib.sha1(repr(normalize(parts)).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.folder, key+'.npz')
+
+    def get(self, key):
+        """
+        result saved with key, None if it is not in the cache
+        """
+        try:
+            with np.load(self.path(key)) as data:
+                result = {name: data[name] for name in data.files}
+            #the date of modification is the date of the last use (least recently used eviction)
+            os.utime(self.path(key))
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return None
+        return result
+
+    def put(self, key, result):
+        """
+        save a result (dictionary of arrays) and remove the oldest results if the cache is too big
+        """
+        temporary = self.path(key)+'.'+str(os.getpid())+'.tmp'
+        with open(temporary, 'wb') as file:
+            np.savez(file, **result)
+        os.replace(temporary, self.path(key))
+        self.evict()
+
+    def stage(self, key, compute):
+        """
+        result of a stage: read from the cache, or computed by compute() and saved
+        """
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def evict(self):
+        """
+        remove the least recently used results until the cache is smaller than max_size
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.folder, '*.npz')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        size = sum(entry[1] for entry in entries)
+        for mtime, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+
+    def clear(self):
+        """
+        remove all the results of the cache
+        """
+        for path in glob.glob(os.path.join(self.folder, '*.npz')):
+            os.remove(path)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Line flattening of AFM height maps (images of any shape)
+
+Each line (row) of the scan is fitted by a polynomial which is subtracted. The holes
+and the particles would bias the fit: the points too far from the fit of their line
+are excluded and the lines are fitted again (sigma clipping with the median absolute deviation,
+a few iterations).
+All the lines are fitted at once (weighted least squares, one small linear system per
+line). Each line is flattened independently of the others, so iter_flatten gives
+the same result (up to rounding errors) block of lines by block of lines, for scans
+larger than the memory.
+"""
+
+import numpy as np
+
+def line_basis(n_columns, order):
+    """
+    polynomials of the fit evaluated on the columns (x from -1 to 1 for the conditioning)
+    input : number of columns, order of the polynomials
+    output : array (n_columns, order+1)
+    """
+    x = np.linspace(-1, 1, n_columns)
+    return np.vander(x, order+1, increasing=True)
+
+def fit_lines(im, order=1, weights=None):
+    """
+    least squares fit of each line by a polynomial
+    input : image, order of the polynomials
+            weights: None or boolean image, False = point excluded of the fit
+                     (the lines with less than order+1 points are fitted with all their points)
+    output : coefficients of each line (rows, order+1), see line_basis
+    """
+    basis = line_basis(im.shape[1], order)
+    if weights is None:
+        return np.linalg.lstsq(basis, im.T, rcond=None)[0].T
+    weights = weights.astype(float)
+    few = weights.sum(axis=1) < order+1
+    weights[few] = 1
+    #normal equations of each line: (basis.T W basis) c = basis.T W y
+    products = (basis[:, :, None] * basis[:, None, :]).reshape(im.shape[1], -1)
+    gram = (weights @ products).reshape(-1, order+1, order+1)
+    weights *= im
+    rhs = weights @ basis
+    return np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+
+def flatten_lines(im, order=1, n_iter=5, n_sigma=2.5, mask=None):
+    """
+    flatten the picture line by line, the holes and the particles being excluded of the fit
+    input : image (any shape)
+            order: order of the polynomials (0 = mean of the line as in correct_lines_objects)
+            n_iter: maximum number of fits, after each fit the points farther than n_sigma
+                    standard deviations of their line (estimated by 1.4826 MAD) from its
+                    median are excluded of the next fit
+            mask: None or boolean image, True = point always excluded (known objects)
+    output : image corrected, boolean image of the points excluded of the last fit
+    """
+    im = np.asarray(im, dtype=float)
+    keep = np.ones(im.shape, dtype=bool) if mask is None else ~mask
+    basis = line_basis(im.shape[1], order)
+    excluded = ~keep
+    for i in range(n_iter):
+        residual = im - fit_lines(im, order, ~excluded) @ basis.T
+        if i == n_iter-1:
+            break
+        #robust standard deviation of the points of each line kept in the fit (1.4826 MAD):
+        #a hole covering a large part of a line does not increase it, so it is excluded
+        kept = np.where(excluded, np.nan, residual)
+        kept[excluded.all(axis=1)] = 0
+        center = np.nanmedian(kept, axis=1)[:, None]
+        sigma = 1.4826*np.nanmedian(np.abs(kept - center), axis=1)[:, None]
+        new_excluded = (np.abs(residual - center) > n_sigma*sigma) | ~keep
+        if np.array_equal(new_excluded, excluded):
+            break
+        excluded = new_excluded
+    return residual, excluded
+
+def iter_flatten(im, order=1, n_iter=5, n_sigma=2.5, mask=None, block_size=256):
+    """
+    flatten_lines block of lines by block of lines: only block_size lines are in memory,
+    im can be a np.memmap, the result is the same as flatten_lines (up to rounding errors)
+    for example:  for rows, block, excluded in iter_flatten(im): out[rows] = block
+    input : parameters of flatten_lines, block_size: number of lines of each block
+    output : generator of (slice of the rows, image corrected, points excluded) for each block
+    """
+    for start in range(0, im.shape[0], block_size):
+        rows = slice(start, min(start+block_size, im.shape[0]))
+        block, excluded = flatten_lines(im[rows], order, n_iter, n_sigma,
+                                        None if mask is None else mask[rows])
+        yield rows, block, excluded
@@ -0,0 +1,534 @@
+# -*- coding: utf-8 -*-
+"""
+Functions to detect holes in AFM pictures (diameters and depths)
+They are used by AFM_hole_detection.py (one scan, with figures) and by
+AFM_batch.py (all the scans of a directory tree)
+
+The Bruker files are read with AFM_Bruker.py (same values as pySPM.Bruker)
+"""
+
+import numpy as np
+import numpy.ma as ma
+import os
+import ntpath
+import time
+import hashlib
+import inspect
+import skimage
+import scipy
+from collections import OrderedDict
+from math import sqrt, pi
+from concurrent.futures import ProcessPoolExecutor
+from skimage.feature import blob_log
+from skimage import exposure, filters
+from skimage import segmentation, measure, morphology
+from skimage import img_as_ubyte
+from scipy import ndimage, spatial
+from AFM_Flatten import flatten_lines
+from AFM_Bruker import BrukerFile
+from AFM_Cache import file_hash, code_version
+
+def correct_lines_objects(im):
+    """
+    flaten the picture taking into acount main holes (average in lines without holes)
+    see also flatten_lines in AFM_Flatten.py (polynomial fit of each line)
+    input : image (any shape)
+    output : image corrected
+    """
+    image_correct_line = im - np.mean(im, axis=1)[:, None]
+    p_min = np.amin(image_correct_line)
+    p_max = np.amax(image_correct_line)
+    image_g = img_as_ubyte(1-(image_correct_line-p_min)/(p_max-p_min))
+    im_eq = exposure.equalize_adapthist(image_g)
+    seuil = filters.threshold_otsu(im_eq)
+    mask = im_eq > seuil+0.05
+    imx = ma.masked_array(im,mask) 
+    im_corrected = im - np.mean(imx, axis=1)[:, None]
+    return im_corrected
+
+def disks(shape, rows, cols, radii):
+    """
+    draw disks in an image, same px as draw.circle for each disk but all the disks
+    with the same radius are drawn at once (blob_log gives only num_sigma radii)
+    input : shape of the image, rows, cols: centers of the disks, radii: radius of each disk
+    output : boolean image, True in the disks
+    """
+    image = np.zeros(shape, dtype=bool)
+    rows, cols, radii = np.asarray(rows), np.asarray(cols), np.broadcast_to(radii, np.shape(rows))
+    for radius in np.unique(radii):
+        same = radii == radius
+        r, c = rows[same][:,None], cols[same][:,None]
+        #px of the square around each center: (disks, px of the square)
+        n = int(np.ceil(radius))+1
+        dr, dc = np.mgrid[-n:n+1, -n:n+1]
+        if np.all(r == np.floor(r)) and np.all(c == np.floor(c)):
+            #centers on px (blob_log): the same px around each center, tested once
+            footprint = (dr/radius)**2 + (dc/radius)**2 < 1
+            rr = r.astype(int) + dr[footprint]
+            cc = c.astype(int) + dc[footprint]
+            inside = np.ones(rr.shape, dtype=bool)
+        else:
+            rr = np.floor(r).astype(int) + dr.ravel()
+            cc = np.floor(c).astype(int) + dc.ravel()
+            #same test as draw.circle
+            inside = ((rr-r)/radius)**2 + ((cc-c)/radius)**2 < 1
+        inside &= (rr >= 0) & (rr < shape[0]) & (cc >= 0) & (cc < shape[1])
+        image[rr[inside], cc[inside]] = True
+    return image
+
+def equalize(im, clip_limit=.01):
+    """
+    pretreatment of find_holes: height image to contrasted image (holes are bright)
+    input : image, clip_limit of equalize_adapthist
+    output : equalized image (float between 0 and 1)
+    """
+    p_min = np.amin(im)
+    p_max = np.amax(im)
+    im_corrected_g = img_as_ubyte(1-(im-p_min)/(p_max-p_min))
+    return exposure.equalize_adapthist(im_corrected_g, clip_limit=clip_limit)
+
+def detect_blobs(im_cor_eq, min_sigma=1, max_sigma=25, num_sigma=20, threshold=.1):
+    """
+    approach position and size of the holes (blob_log)
+    input : equalized image (see equalize), parameters of blob_log
+    output : blobs [:,0]=row [:,1]=column [:,2]=radius (px)
+    """
+    #Use blob_log fonction (Laplacian of Gaussian) to find approach size of holes
+    #to stay short time analysis : num_sigma=20
+    #to small holes : min_sigma=1 , max_sigma=25
+    #to big holes : min_sigma=15 , max_sigma=60
+    blobs_log = blob_log(im_cor_eq, min_sigma=min_sigma , max_sigma=max_sigma, num_sigma=num_sigma, threshold=threshold)
+    blobs_log[:, 2] = blobs_log[:, 2] * sqrt(2)
+    return blobs_log
+
+def prune_blobs(blobs, overlap=.5):
+    """
+    remove the smaller blob of each pair of blobs overlapping more than overlap, same
+    result as the pruning of blob_log but the overlaps of all the pairs are computed at once
+    input : blobs [:,0]=row [:,1]=column [:,2]=sigma,
+            overlap: fraction of the area of the smaller blob
+    output : remaining blobs
+    """
+    tree = spatial.cKDTree(blobs[:, :2])
+    pairs = np.array(list(tree.query_pairs(2*sqrt(2)*blobs[:, 2].max())), dtype=int).reshape(-1, 2)
+    s1, s2 = blobs[pairs[:, 0], 2], blobs[pairs[:, 1], 2]
+    #coordinates divided by sigma*sqrt(2) of the larger blob: its radius is 1
+    max_sigma = np.maximum(s1, s2)
+    r1, r2 = s1/max_sigma, s2/max_sigma
+    pos1 = blobs[pairs[:, 0], :2] / (max_sigma*sqrt(2))[:, None]
+    pos2 = blobs[pairs[:, 1], :2] / (max_sigma*sqrt(2))[:, None]
+    d = np.sqrt(np.sum((pos2-pos1)**2, axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acos1 = np.arccos(np.clip((d**2 + r1**2 - r2**2) / (2*d*r1), -1, 1))
+        acos2 = np.arccos(np.clip((d**2 + r2**2 - r1**2) / (2*d*r2), -1, 1))
+        area = r1**2*acos1 + r2**2*acos2 - 0.5*np.sqrt(np.abs((-d+r2+r1)*(d-r2+r1)*(d+r2-r1)*(d+r2+r1)))
+        fraction = area / (pi*np.minimum(r1, r2)**2)
+    fraction = np.where(d <= np.abs(r1-r2), 1., fraction)
+    fraction[d > r1+r2] = 0
+    #in the order of blob_log: a removed blob does not remove other blobs
+    sigma = blobs[:, 2].copy()
+    for i, j in pairs[fraction > overlap]:
+        if sigma[i] > 0 and sigma[j] > 0:
+            if sigma[i] > sigma[j]:
+                sigma[j] = 0
+            else:
+                sigma[i] = 0
+    return blobs[sigma > 0]
+
+class ScaleSpace:
+    """
+    scale space of a scan, for sweeps of the parameters of detect_blobs: the equalized
+    image, the LoG image of each sigma and the local maxima of each list of sigmas are
+    computed once. A new threshold only selects and prunes the maxima again, a new
+    sigma range only computes the LoG images of the new sigmas. The blobs are the
+    same as with detect_blobs. Use scale_space to get the cached object of an image.
+    /!\ one LoG image (float64) is kept for each sigma: 128 MB per sigma for 4096x4096
+    input : image, clip_limit of equalize
+    """
+    def __init__(self, im, clip_limit=.01):
+        self.im_cor_eq = equalize(im, clip_limit)
+        self.layers = {}
+        self.maxima = {}
+
+    def layer(self, sigma):
+        """
+        LoG image of the equalized image, normalized by sigma**2 as in blob_log
+        input : sigma (px)
+        output : image (holes are positive)
+        """
+        key = round(float(sigma), 9)
+        if key not in self.layers:
+            self.layers[key] = -ndimage.gaussian_laplace(self.im_cor_eq, sigma) * sigma**2
+        return self.layers[key]
+
+    def local_maxima(self, sigma_list):
+        """
+        local maxima of the LoG images (3x3x3 neighbourhood in (row, column, sigma)),
+        the same peaks and in the same order as peak_local_max in blob_log
+        input : list of sigmas
+        output : (row, column, index in sigma_list) of the maxima, LoG value of the maxima
+                 both sorted by decreasing value
+        """
+        key = tuple(np.round(sigma_list, 9))
+        if key not in self.maxima:
+            cube = np.stack([self.layer(sigma) for sigma in sigma_list], axis=-1)
+            is_max = cube == ndimage.maximum_filter(cube, size=3, mode='nearest')
+            if np.all(is_max):
+                #no peak for a flat image
+                is_max[:] = False
+            coords = np.nonzero(is_max)
+            values = cube[coords]
+            order = np.argsort(-values, kind='stable')
+            self.maxima[key] = (np.transpose(coords)[order], values[order])
+        return self.maxima[key]
+
+    def blobs(self, min_sigma=1, max_sigma=25, num_sigma=20, threshold=.1):
+        """
+        same as detect_blobs without computing again the LoG images
+        input : parameters of blob_log
+        output : blobs [:,0]=row [:,1]=column [:,2]=radius (px)
+        """
+        sigma_list = np.linspace(min_sigma, max_sigma, num_sigma)
+        coords, values = self.local_maxima(sigma_list)
+        #the maxima are sorted: the ones above the threshold are the first ones
+        n = np.count_nonzero(values > threshold)
+        if n == 0:
+            return np.empty((0, 3))
+        blobs_log = np.column_stack((coords[:n, :2], sigma_list[coords[:n, 2]])).astype(float)
+        blobs_log = prune_blobs(blobs_log)
+        blobs_log[:, 2] = blobs_log[:, 2] * sqrt(2)
+        return blobs_log
+
+_scale_spaces = OrderedDict()
+
+def scale_space(im, clip_limit=.01, cache_size=4):
+    """
+    ScaleSpace of an image, kept in memory: the same image (same pixels) with the same
+    clip_limit gives the same object, the last cache_size scale spaces are kept
+    input : image, clip_limit of equalize, number of scale spaces kept
+    output : ScaleSpace
+    """
+    pixels = np.ascontiguousarray(ma.getdata(im))
+    key = (hashlib.sha1(pixels).hexdigest(), pixels.shape, pixels.dtype.str, clip_limit)
+    if key in _scale_spaces:
+        _scale_spaces.move_to_end(key)
+    else:
+        _scale_spaces[key] = ScaleSpace(im, clip_limit)
+        while len(_scale_spaces) > cache_size:
+            _scale_spaces.popitem(last=False)
+    return _scale_spaces[key]
+
+def holes_markers(shape, blobs_log):
+    """
+    markers of the watershed: 1 = background (far from the blobs), 2... = center of each hole
+    input : shape of the image, blobs (see detect_blobs)
+    output : image of markers
+    """
+    #plot holes, the black area (0) will be the background marker
+    blob=disks(shape, blobs_log[:,0], blobs_log[:,1], blobs_log[:,2])
+    blob=ndimage.binary_dilation(blob)
+    
+    #plot center of holes, will be markers 
+    blob_peak=disks(shape, blobs_log[:,0], blobs_log[:,1], 2)
+
+    #label markers
+    markers_black = (blob < 0.4).astype(int)
+    labels_peaks = measure.label(blob_peak)
+    markers_black +=  labels_peaks
+    return markers_black
+
+def watershed_holes(gradient, markers_black):
+    """
+    regions of the holes grown from the markers (see holes_markers)
+    input : gradient of the equalized image, markers
+    output : image 0=background int=different regions=holes
+    """
+    # /!\ watershed method take a gradient in argument
+    ws = segmentation.watershed(gradient, markers_black)
+    return morphology.opening(ws)
+
+def find_holes(im, min_sigma=1, max_sigma=25, num_sigma=20, threshold=.1, timing=None, cache=False):
+    """
+    find holes in a picture
+    input : image
+            timing: if a dictionary is given, the time spent in each stage (s) is added to it
+            cache: if True, the equalized image and the LoG images are kept (see scale_space),
+                   to run it again on the same image with other parameters
+    output : image 0=background int=different regions=holes
+    """
+    times = [time.time()]
+    #Pretreatment
+    if cache:
+        space = scale_space(im)
+        im_cor_eq = space.im_cor_eq
+    else:
+        im_cor_eq = equalize(im)
+    times.append(time.time())
+    if cache:
+        blobs_log = space.blobs(min_sigma, max_sigma, num_sigma, threshold)
+    else:
+        blobs_log = detect_blobs(im_cor_eq, min_sigma, max_sigma, num_sigma, threshold)
+    times.append(time.time())
+    markers_black = holes_markers(np.shape(im), blobs_log)
+    times.append(time.time())
+    gradient = ndimage.gaussian_gradient_magnitude(im_cor_eq, 2)
+    times.append(time.time())
+    final = watershed_holes(gradient, markers_black)
+    times.append(time.time())
+
+    if timing is not None:
+        stages = ['equalize', 'blob_log', 'markers', 'gradient', 'watershed']
+        for stage, start, end in zip(stages, times[:-1], times[1:]):
+            timing[stage] = end-start
+    return final
+
+def tile_slices(shape, tile_size, overlap):
+    """
+    cut an image in tiles
+    input : shape of the image, size of the tiles (px), overlap: margin added around each tile (px)
+    output : list of (core, tile): slices of each tile without and with its margin
+    """
+    slices = []
+    for r0 in range(0, shape[0], tile_size):
+        for c0 in range(0, shape[1], tile_size):
+            core = (slice(r0, min(r0+tile_size, shape[0])), slice(c0, min(c0+tile_size, shape[1])))
+            tile = (slice(max(r0-overlap, 0), min(r0+tile_size+overlap, shape[0])),
+                    slice(max(c0-overlap, 0), min(c0+tile_size+overlap, shape[1])))
+            slices.append((core, tile))
+    return slices
+
+def detect_blobs_tile(im_tile, core, tile, holes_parameters):
+    """
+    detect_blobs in a tile (with its margin), keeps the blobs centered in the core of the tile
+    output : blobs in the coordinates of the whole image
+    """
+    blobs_log = detect_blobs(im_tile, **holes_parameters)
+    blobs_log[:, 0] += tile[0].start
+    blobs_log[:, 1] += tile[1].start
+    in_core = ((blobs_log[:, 0] >= core[0].start) & (blobs_log[:, 0] < core[0].stop) &
+               (blobs_log[:, 1] >= core[1].start) & (blobs_log[:, 1] < core[1].stop))
+    return blobs_log[in_core]
+
+def watershed_tile(im_tile, markers_tile, core, tile):
+    """
+    gradient and watershed_holes in a tile (with its margin)
+    output : regions in the core of the tile
+    """
+    gradient = ndimage.gaussian_gradient_magnitude(im_tile, 2)
+    final = watershed_holes(gradient, markers_tile)
+    return final[core[0].start-tile[0].start:core[0].stop-tile[0].start,
+                 core[1].start-tile[1].start:core[1].stop-tile[1].start]
+
+def find_holes_tiled(im, min_sigma=1, max_sigma=25, num_sigma=20, threshold=.1,
+                     tile_size=1024, overlap=None, n_processes=None, timing=None):
+    """
+    same as find_holes for large pictures (4096x4096, stitched scans): blob_log
+    (num_sigma images of the size of the tile) and watershed are done on overlapping
+    tiles in parallel processes, so that the memory is set by the size of the tiles
+    The equalization and the markers are computed on the whole image: the labels of the
+    holes are the same in all the tiles, each px takes the label of the tile whose core
+    contains it. The holes are the same as with find_holes except near the borders
+    of the tiles for holes larger than the overlap.
+    input : image, parameters of find_holes
+            tile_size: size of the tiles (px)
+            overlap: margin around each tile (px), by default 7*max_sigma (support of the
+                     largest Laplacian of Gaussian and of the largest holes)
+            n_processes: number of processes, None = number of cores
+    output : image 0=background int=different regions=holes
+    """
+    if overlap is None:
+        overlap = int(np.ceil(7*max_sigma))
+    holes_parameters = dict(min_sigma=min_sigma, max_sigma=max_sigma, num_sigma=num_sigma,
+                            threshold=threshold)
+    slices = tile_slices(np.shape(im), tile_size, overlap)
+    times = [time.time()]
+    im_cor_eq = equalize(im)
+    times.append(time.time())
+    with ProcessPoolExecutor(n_processes) as pool:
+        blobs = pool.map(detect_blobs_tile, [im_cor_eq[tile] for core, tile in slices],
+                         *zip(*slices), [holes_parameters]*len(slices))
+        blobs_log = np.concatenate(list(blobs), axis=0)
+        times.append(time.time())
+        markers_black = holes_markers(np.shape(im), blobs_log)
+        times.append(time.time())
+        final = np.zeros(np.shape(im), dtype=markers_black.dtype)
+        cores = pool.map(watershed_tile, [im_cor_eq[tile] for core, tile in slices],
+                         [markers_black[tile] for core, tile in slices], *zip(*slices))
+        for (core, tile), final_core in zip(slices, cores):
+            final[core] = final_core
+    times.append(time.time())
+
+    if timing is not None:
+        stages = ['equalize', 'blob_log', 'markers', 'watershed']
+        for stage, start, end in zip(stages, times[:-1], times[1:]):
+            timing[stage] = end-start
+    return final
+
+def find_properties(im, scaling, im_height):
+    """
+    find diameters and depth of the holes
+    all the holes are measured at once (reductions indexed by the labels of the regions)
+    input:  im: image of regions
+            scaling: size of a pixel (nm)
+            im_height: height image (corrected) in which the depths are measured
+    output: particules give [:,0]=x [:,1]=y (centroid in px) [:,2]=dimeters in nm
+            [:,3]=depth in nm (minimum height in the hole) [:,4]=mean depth in nm
+            [:,5]=volume in nm^3 (sum of the heights in the hole, negative as the depth)
+    """
+    #suppress objects on edges
+    im_wo_edges = segmentation.clear_border(im)
+    im_height = np.asarray(im_height)
+    labels = np.unique(im_wo_edges)
+    labels = labels[labels > 0]
+    if len(labels) == 0:
+        return np.zeros((0, 6))
+
+    #area and centroid of each region from the sums of 1, rows and columns over the regions
+    flat = im_wo_edges.ravel()
+    area = np.bincount(flat)[labels]
+    rows, cols = np.indices(im_wo_edges.shape)
+    x = np.bincount(flat, weights=rows.ravel())[labels]/area
+    y = np.bincount(flat, weights=cols.ravel())[labels]/area
+
+    #Calculate droplets diameters (diameter of the disk with the same area)
+    diameter = 2*np.sqrt(area/pi)*scaling
+
+    #Find maximum depth, mean depth and volume
+    max_depth = ndimage.minimum(im_height, im_wo_edges, labels)
+    sum_height = np.bincount(flat, weights=im_height.ravel())[labels]
+    mean_depth = sum_height/area
+    volume = sum_height*scaling**2
+
+    particules = np.stack([x, y, diameter, max_depth, mean_depth, volume], axis=1)
+    return particules
+
+
+def load_scan(filename, channel="Height Sensor", square=False):
+    """
+    load a channel of a Bruker AFM file (SVI version)
+    input:  filename: path of the file
+            channel: name of the channel (see BrukerFile(filename).channels)
+            square: True to cut the picture to a square (sometimes SVI AFM bugs)
+    output: image: the picture
+            scaling: size of a pixel in nm
+    """
+    imageSPM = BrukerFile(filename).get_channel(channel=channel)
+    image = imageSPM.pixels
+    if square and image.shape[0] != image.shape[1]:
+        size = np.min(image.shape)
+        image = image[:size,:size]
+    #Save the scale to convert pixels in lenght 
+    #Here I assume you work in nm
+    if imageSPM.size['real']['unit'] == 'um' :
+        scaling= 1000 * imageSPM.size['real']['x']/imageSPM.size['pixels']['x']
+    else:
+        scaling= imageSPM.size['real']['x']/imageSPM.size['pixels']['x'] 
+    return image, scaling
+
+def scan_keys(cache, filename, channel="Height Sensor", flatten_parameters=None, holes_parameters={},
+              loader=None):
+    """
+    keys of the stages of analyse_scan in a StageCache (see AFM_Cache.py): the key of a stage
+    depends on the key of the stage before (the first one on the content of the file),
+    on the parameters of the stage and on the code of its functions
+    output: dictionary {'flatten': key, 'holes': key, 'properties': key}
+    """
+    if loader is None:
+        load_code = [load_scan, inspect.getmodule(BrukerFile)]
+    else:
+        load_code = [loader]
+    if flatten_parameters is None:
+        flatten_code = code_version(*load_code, correct_lines_objects)
+    else:
+        flatten_code = code_version(*load_code, inspect.getmodule(flatten_lines))
+    keys = {}
+    keys['flatten'] = cache.key(file_hash(filename), channel, flatten_parameters, flatten_code)
+    holes_code = code_version(find_holes, equalize, detect_blobs, prune_blobs, ScaleSpace, scale_space,
+                              holes_markers, disks, watershed_holes)
+    keys['holes'] = cache.key(keys['flatten'], holes_parameters, holes_code,
+                              skimage.__version__, scipy.__version__)
+    keys['properties'] = cache.key(keys['holes'], code_version(find_properties))
+    return keys
+
+def analyse_scan(filename, channel="Height Sensor", flatten_parameters=None, info=None, cache=None,
+                 images=None, loader=None, **holes_parameters):
+    """
+    whole analysis of one scan: loading, flatening, holes detection and properties
+    input:  filename, channel: see load_scan
+            flatten_parameters: None to flaten with correct_lines_objects, or dictionary of the
+                                parameters of flatten_lines (order, n_iter, n_sigma), {} for the defaults
+            info: if a dictionary is given, scaling (nm/px), rows and cols of the picture are added to it
+            cache: None or StageCache (see AFM_Cache.py): the result of each stage is kept on the disk,
+                   only the stages whose file, parameters or code changed are computed (see scan_keys)
+            images: if a dictionary is given, im_corrected (flatened image) and im_object
+                    (regions of the holes, see find_holes) are added to it
+            loader: None to read the file with load_scan, or function(filename, channel) returning
+                    (image, scaling) for other files (see AFM_benchmark.py)
+            holes_parameters: parameters of find_holes (min_sigma, max_sigma, num_sigma, threshold)
+    output: particules: see find_properties
+            timing: dictionary of the time spent in each stage computed (s), see also find_holes
+    """
+    timing = {}
+    start = time.time()
+    if cache is not None:
+        keys = scan_keys(cache, filename, channel, flatten_parameters, holes_parameters, loader)
+    results = {}
+
+    def stage(name, compute):
+        #each stage is computed (or read from the cache) once
+        if name not in results:
+            results[name] = compute() if cache is None else cache.stage(keys[name], compute)
+        return results[name]
+
+    def flatten():
+        load_start = time.time()
+        image, scaling = (load_scan if loader is None else loader)(filename, channel)
+        timing['load'] = time.time()-load_start
+        if flatten_parameters is None:
+            im_corrected = correct_lines_objects(image)
+        else:
+            im_corrected = flatten_lines(image, **flatten_parameters)[0]
+        timing['flatten'] = time.time()-load_start-timing['load']
+        return {'im_corrected': ma.getdata(im_corrected), 'mask': ma.getmaskarray(im_corrected),
+                'scaling': scaling}
+
+    def corrected():
+        flat = stage('flatten', flatten)
+        return ma.masked_array(flat['im_corrected'], flat['mask'])
+
+    def holes():
+        holes_start = time.time()
+        im_object = find_holes(corrected(), timing=timing, **holes_parameters)
+        timing['holes'] = time.time()-holes_start
+        return {'im_object': im_object}
+
+    def properties():
+        im_object = stage('holes', holes)['im_object']
+        scaling = float(stage('flatten', flatten)['scaling'])
+        properties_start = time.time()
+        particules = find_properties(im_object, scaling, corrected())
+        timing['properties'] = time.time()-properties_start
+        return {'particules': particules, 'scaling': scaling, 'shape': np.shape(im_object)}
+
+    result = stage('properties', properties)
+    if info is not None:
+        info.update(scaling=float(result['scaling']), rows=int(result['shape'][0]), cols=int(result['shape'][1]))
+    if images is not None:
+        images['im_corrected'] = corrected()
+        images['im_object'] = stage('holes', holes)['im_object']
+    timing['total'] = time.time()-start
+    return result['particules'], timing
+
+def properties_filename(filename):
+    """
+    name of the text file where the diameters and depths of a scan are saved
+    """
+    folder_name = ntpath.dirname(filename)
+    title = ntpath.basename(filename).replace('.001','')
+    return os.path.join(folder_name, 'Diam_Dep_'+title+'.txt')
+
+def save_properties(filename, particules):
+    """
+    save the diameters (nm) and depths of the holes of the scan filename
+    """
+    np.savetxt(properties_filename(filename), particules[:,2:4],'%.2f %.2f')
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Store of the holes of many AFM scans, to aggregate statistics over a sample campaign
+without reading one Diam_Dep text file per scan
+
+The store is a folder of NPZ files (shards). Each append writes a new shard and the
+shards are never modified (a batch run adds one shard). A shard has two tables of columns:
+ - scans: one row per scan (file, channel, pixel size, shape, dates, parameters, number of holes)
+ - holes: one row per hole, the columns of find_properties and the index of its scan
+The shards are loaded once (binary arrays, no text parsing) and concatenated, the queries
+are boolean masks on the columns. A scan analysed again is appended again, by default
+the queries only use the last analysis of each file (latest=True).
+
+Example:
+    store = HolesStore('AFM_holes_store')
+    store.append(['scan.001'], [particules], channel=['Height Sensor'], scaling=[3.9])
+    holes = store.holes(diameter=(20, 100), filename='*sample_A*')
+    counts, bins = store.histogram('diameter', bins=50, depth=(None, -2))
+"""
+
+import os
+import glob
+import time
+import fnmatch
+import numpy as np
+
+#columns of find_properties
+HOLE_COLUMNS = ['x', 'y', 'diameter', 'depth', 'mean_depth', 'volume']
+#columns of the scans and their value when they are not given
+SCAN_COLUMNS = {'filename': '', 'channel': '', 'scaling': np.nan, 'rows': -1, 'cols': -1,
+                'mtime': np.nan, 'date': np.nan, 'parameters': ''}
+
+def select(columns, filters):
+    """
+    rows of a table which fulfill all the conditions
+    input : columns: dictionary of arrays of the same length
+            filters: {column: condition}, condition = (low, high) range (None = no bound),
+                     pattern with wildcards for the strings (fnmatch), function of the column
+                     returning a boolean array, or value
+    output : boolean array
+    """
+    n = len(next(iter(columns.values())))
+    mask = np.ones(n, dtype=bool)
+    for name, condition in filters.items():
+        values = columns[name]
+        if isinstance(condition, tuple):
+            low, high = condition
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        elif isinstance(condition, str) and values.dtype.kind == 'U':
+            mask &= np.array([fnmatch.fnmatch(value, condition) for value in values], dtype=bool)
+        elif callable(condition):
+            mask &= condition(values)
+        else:
+            mask &= values == condition
+    return mask
+
+class HolesStore:
+    """
+    append-only store of the holes of AFM scans (see the top of the file)
+    input : folder of the store (created if needed)
+    /!\\ only one program should append to a store at a time
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.loaded = []
+        self.tables = {'scans': {}, 'holes': {}}
+
+    def shards(self):
+        """
+        list of the shards of the store, in the order they were appended
+        """
+        return sorted(glob.glob(os.path.join(self.folder, 'shard_*.npz')))
+
+    def append(self, filenames, particules, **scan_columns):
+        """
+        add the holes of scans in a new shard
+        input : filenames: names of the scans
+                particules: list of the outputs of find_properties, one per scan
+                scan_columns: other columns of SCAN_COLUMNS, one value per scan
+                              (mtime is read on the disk and date is now if not given)
+        output : name of the shard
+        """
+        unknown = set(scan_columns) - set(SCAN_COLUMNS)
+        if unknown:
+            raise ValueError('unknown scan columns: '+', '.join(sorted(unknown)))
+        n = len(filenames)
+        scan_columns['filename'] = [os.path.abspath(filename) for filename in filenames]
+        if 'mtime' not in scan_columns:
+            scan_columns['mtime'] = [os.path.getmtime(filename) if os.path.exists(filename) else np.nan
+                                     for filename in filenames]
+        if 'date' not in scan_columns:
+            scan_columns['date'] = [time.time()]*n
+        arrays = {}
+        for name, default in SCAN_COLUMNS.items():
+            arrays['scans_'+name] = np.asarray(scan_columns.get(name, [default]*n))
+        arrays['scans_n_holes'] = np.array([len(p) for p in particules], dtype=int)
+        holes = np.concatenate([np.reshape(p, (-1, len(HOLE_COLUMNS))) for p in particules]) if n else np.zeros((0, len(HOLE_COLUMNS)))
+        arrays['holes_scan'] = np.repeat(np.arange(n), arrays['scans_n_holes'])
+        for i, name in enumerate(HOLE_COLUMNS):
+            arrays['holes_'+name] = holes[:, i]
+
+        shards = self.shards()
+        number = int(os.path.basename(shards[-1])[6:-4])+1 if shards else 1
+        shard = os.path.join(self.folder, 'shard_%06d.npz' % number)
+        #written with another name first: a shard is complete or absent
+        with open(shard+'.tmp', 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(shard+'.tmp', shard)
+        return shard
+
+    def load(self):
+        """
+        load the shards appended since the last call (the others are kept in memory)
+        output : {'scans': columns of the scans, 'holes': columns of the holes}
+                 holes['scan'] is the index of the scan of each hole in the scans table
+        """
+        new = [shard for shard in self.shards() if shard not in self.loaded]
+        if not new:
+            return self.tables
+        parts = {'scans': [self.tables['scans']] if self.loaded else [],
+                 'holes': [self.tables['holes']] if self.loaded else []}
+        n_scans = len(self.tables['scans']['filename']) if self.loaded else 0
+        for shard in new:
+            with np.load(shard) as data:
+                scans = {name[6:]: data[name] for name in data.files if name.startswith('scans_')}
+                holes = {name[6:]: data[name] for name in data.files if name.startswith('holes_')}
+            holes['scan'] = holes['scan'] + n_scans
+            n_scans += len(scans['filename'])
+            parts['scans'].append(scans)
+            parts['holes'].append(holes)
+        for table in ['scans', 'holes']:
+            names = parts[table][-1].keys()
+            self.tables[table] = {name: np.concatenate([part[name] for part in parts[table]])
+                                  for name in names}
+        self.loaded += new
+        return self.tables
+
+    def scans(self, latest=True, **filters):
+        """
+        scans of the store
+        input : latest: True to keep only the last analysis of each file
+                filters: conditions on the scan columns (see select)
+        output : columns of the selected scans, with 'scan' their index in the store
+        """
+        scans = dict(self.load()['scans'])
+        if not scans:
+            return {}
+        scans['scan'] = np.arange(len(scans['filename']))
+        mask = select(scans, filters)
+        if latest:
+            #index of the last occurrence of each filename
+            reverse = scans['filename'][::-1]
+            last = len(reverse)-1-np.unique(reverse, return_index=True)[1]
+            is_last = np.zeros(len(mask), dtype=bool)
+            is_last[last] = True
+            mask &= is_last
+        return {name: values[mask] for name, values in scans.items()}
+
+    def holes(self, columns=None, latest=True, **filters):
+        """
+        holes of the store, for example holes(['diameter'], depth=(None, -2), channel='Height Sensor')
+        input : columns: list of the columns to return (None = all the columns of the holes)
+                latest: see scans
+                filters: conditions on the columns of the holes or of their scans (see select)
+        output : columns of the selected holes, 'scan' is the index of their scan
+        """
+        tables = self.load()
+        if not tables['holes']:
+            return {}
+        hole_filters = {name: c for name, c in filters.items() if name in tables['holes']}
+        scan_filters = {name: c for name, c in filters.items() if name not in tables['holes']}
+        holes = tables['holes']
+        selected_scans = np.zeros(len(tables['scans']['filename']), dtype=bool)
+        selected_scans[self.scans(latest, **scan_filters)['scan']] = True
+        mask = selected_scans[holes['scan']] & select(holes, hole_filters)
+        if columns is None:
+            columns = list(holes.keys())
+        return {name: (holes[name] if name in holes else tables['scans'][name][holes['scan']])[mask]
+                for name in columns}
+
+    def histogram(self, column, bins=50, range=None, latest=True, **filters):
+        """
+        histogram of a column of the selected holes (see holes)
+        output : counts, edges of the bins (as np.histogram)
+        """
+        values = self.holes([column], latest, **filters).get(column, np.zeros(0))
+        return np.histogram(values, bins=bins, range=range)
+
+    def compact(self):
+        """
+        rewrite the store in one shard with only the last analysis of each file
+        """
+        scans = self.scans()
+        if not scans:
+            return
+        holes = self.holes()
+        order = np.argsort(holes['scan'], kind='stable')
+        particules = np.split(np.stack([holes[name][order] for name in HOLE_COLUMNS], axis=1),
+                              np.cumsum(scans['n_holes'])[:-1])
+        old = self.shards()
+        self.append(scans['filename'], particules,
+                    **{name: scans[name] for name in SCAN_COLUMNS if name != 'filename'})
+        for shard in old:
+            os.remove(shard)
+        self.loaded = []
+        self.tables = {'scans': {}, 'holes': {}}
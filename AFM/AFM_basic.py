@@ -51,10 +51,10 @@ Exemple 2: /!\Warning pySPM use a class named SPM_image
 def correct_lines_objects(im):
     """
     flaten the picture taking into acount main holes (average in lines without holes)
-    input : image /!\it must be a squared image
+    input : image (any shape)
     output : image corrected
     """
-    image_correct_line = im - np.tile(np.mean(im, axis=1).T,(im.shape[0], 1)).T
+    image_correct_line = im - np.mean(im, axis=1)[:, None]
     p_min = np.amin(image_correct_line)
     p_max = np.amax(image_correct_line)
     image_g = img_as_ubyte(1-(image_correct_line-p_min)/(p_max-p_min))
@@ -62,21 +62,15 @@ def correct_lines_objects(im):
     seuil = filters.threshold_otsu(im_eq)
     mask = im_eq > seuil+0.05
     imx = ma.masked_array(im,mask) 
-    im_corrected = image_square - np.tile(np.mean(imx, axis=1).T,(image_square.shape[0], 1)).T
+    im_corrected = im - np.mean(imx, axis=1)[:, None]
     return im_corrected
 
 image = imageSPM.pixels
-#Working with square is simpler and sometimes SVI AFM bugs
-if image.shape[0] != image.shape[1]:
-    square = np.min(image.shape)
-    image_square = image[:square,:square]
-else :
-    image_square = image
     
 #Same as .correct_lines but for numpyarray
-image_correct_line = image_square - np.tile(np.mean(image_square, axis=1).T,(image_square.shape[0], 1)).T 
+image_correct_line = image - np.mean(image, axis=1)[:, None]
 #Best way to correct lines if you have big objects 
-im_corrected = correct_lines_objects(image_square)
+im_corrected = correct_lines_objects(image)
 
 fig, ax = plt.subplots(1,3,figsize=(15,5))
 plt.subplot(131)
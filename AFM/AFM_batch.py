@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Detect holes in all the AFM scans of a directory (and its sub-directories)
+
+Each scan is analysed as in AFM_hole_detection.py (see AFM_Functions.py) in a
+pool of processes, one scan per core at a time. For each scan, the diameters
+and depths are saved in Diam_Dep_[scan].txt next to the scan. Scans whose
+Diam_Dep file is more recent than the scan are not analysed again.
+At the end, two tables are written in the directory:
+ - AFM_batch_[date]_holes.txt: diameters and depths of all the holes of all the scans
+ - AFM_batch_[date]_scans.txt: for each scan, number of holes and time of each stage
+The holes of the analysed scans are also appended to the store AFM_holes_store of the
+directory (see AFM_Store.py), to query and plot the holes of all the scans quickly.
+With a cache (see AFM_Cache.py), only the stages whose scan, parameters or code changed
+are computed again (redo = True after a change of the parameters).
+
+/!\Because of the processes, run this script in a new console or with
+'python AFM_batch.py', the program is in the if __name__ == '__main__': block
+"""
+
+import os
+import re
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from AFM_Functions import analyse_scan, properties_filename, save_properties
+from AFM_Store import HolesStore
+from AFM_Cache import StageCache
+
+#Parameters
+root = '.' #directory with the scans
+channel = "Height Sensor"
+flatten_parameters = None #None = correct_lines_objects, dict(order=1) = flatten_lines (AFM_Flatten.py)
+holes_parameters = dict(min_sigma=1, max_sigma=25, num_sigma=20, threshold=.1)
+n_processes = None #number of processes, None = number of cores
+redo = False #True to analyse again the scans already analysed
+cache_folder = None #folder of the cache of the stages, None = no cache
+cache_size = 2**30 #maximum size of the cache (bytes)
+
+def find_scans(root):
+    """
+    list the Bruker files (extensions .001, .002...) in root and its sub-directories
+    """
+    scans = []
+    for folder_name, folders, files in os.walk(root):
+        for name in sorted(files):
+            if re.search(r'\.\d{3}$', name):
+                scans.append(os.path.join(folder_name, name))
+    return scans
+
+def up_to_date(filename):
+    """
+    True if the properties of the scan have been saved after the last change of the scan
+    """
+    output = properties_filename(filename)
+    return os.path.exists(output) and os.path.getmtime(output) >= os.path.getmtime(filename)
+
+def process_scan(filename, channel, flatten_parameters, holes_parameters, cache):
+    """
+    analyse one scan and save its properties
+    returns the properties, the time of each stage and the information of the scan (see analyse_scan)
+    """
+    info = {}
+    particules, timing = analyse_scan(filename, channel, flatten_parameters, info, cache, **holes_parameters)
+    save_properties(filename, particules)
+    return particules, timing, info
+
+if __name__ == '__main__':
+    start = time.time()
+    scans = find_scans(root)
+    todo = [filename for filename in scans if redo or not up_to_date(filename)]
+    print(str(len(scans))+' scans found, '+str(len(todo))+' to analyse')
+
+    timings = {}
+    analysed = {}
+    failed = set()
+    cache = StageCache(cache_folder, cache_size) if cache_folder is not None else None
+    with ProcessPoolExecutor(n_processes) as pool:
+        futures = {pool.submit(process_scan, filename, channel, flatten_parameters, holes_parameters, cache): filename
+                   for filename in todo}
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                particules, timings[filename], info = future.result()
+                analysed[filename] = (particules, info)
+                print(filename+': '+str(round(timings[filename]['total'], 2))+' s')
+            except Exception as error:
+                failed.add(filename)
+                print(filename+': failed ('+str(error)+')')
+
+    if failed:
+        print(str(len(failed))+' scans failed')
+
+    #Holes of the analysed scans in the store
+    if analysed:
+        names = sorted(analysed)
+        parameters = repr(dict(flatten_parameters=flatten_parameters, **holes_parameters))
+        HolesStore(os.path.join(root, 'AFM_holes_store')).append(
+            names, [analysed[name][0] for name in names], channel=[channel]*len(names),
+            parameters=[parameters]*len(names),
+            **{column: [analysed[name][1][column] for name in names] for column in ['scaling', 'rows', 'cols']})
+
+    #Consolidated tables of the run
+    run_name = os.path.join(root, 'AFM_batch_'+time.strftime('%Y%m%d_%H%M%S'))
+    stages = ['load', 'flatten', 'equalize', 'blob_log', 'markers', 'gradient', 'watershed',
+              'holes', 'properties', 'total']
+    with open(run_name+'_holes.txt', 'w') as holes_file, open(run_name+'_scans.txt', 'w') as scans_file:
+        holes_file.write('scan\tdiameter_nm\tdepth_nm\n')
+        scans_file.write('scan\tholes\tstatus\t'+'\t'.join(s+'_s' for s in stages)+'\n')
+        for filename in scans:
+            #a failed scan keeps the properties file of a previous run: it is not up to date
+            if (filename in todo and filename not in analysed) or not os.path.exists(properties_filename(filename)):
+                scans_file.write(filename+'\t0\tfailed\t'+'\t'*(len(stages)-1)+'\n')
+                continue
+            data = np.loadtxt(properties_filename(filename), ndmin=2)
+            for diameter, depth in data:
+                holes_file.write('%s\t%.2f\t%.2f\n' % (filename, diameter, depth))
+            if filename in timings:
+                status = 'analysed'
+                #the stages read from the cache have no time
+                times = '\t'.join('%.3f' % timings[filename][s] if s in timings[filename] else ''
+                                  for s in stages)
+            else:
+                status = 'up to date'
+                times = '\t'*(len(stages)-1)
+            scans_file.write(filename+'\t'+str(len(data))+'\t'+status+'\t'+times+'\n')
+    print('Results in '+run_name+'_holes.txt and '+run_name+'_scans.txt ('+
+          str(round(time.time()-start, 1))+' s)')
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the holes detection (see AFM_Functions.py)
+
+Synthetic height maps with known holes are generated for several sizes and densities of
+holes (line offsets, tilt and noise as in the AFM scans, holes as paraboloids). Each map is
+analysed by the real entry points, timed stage by stage with their own timing dictionary
+and with their peak memory (tracemalloc, process of the benchmark only):
+- analyse_scan (the map is read by load_synthetic instead of load_scan)
+- find_holes_tiled on the flatened map (tiles of half the map), then find_properties
+- analyse_scan with a StageCache, run a second time: the stages are read from the cache
+then the holes found are compared with the true holes (recall, precision, errors on the
+diameters and depths). The results are written in AFM_benchmark_[date].json.
+Given the json of a previous run (reference), the stages that became slower and the
+accuracies that decreased are printed: a speed-up cannot silently degrade the results.
+
+Run 'python AFM_benchmark.py' or 'python AFM_benchmark.py AFM_benchmark_[date].json'
+(reference). Without argument, the first run is saved as AFM_benchmark_reference.json and
+the next runs are compared with it. The times depend on the computer: a reference is only
+valid on the computer where it was made, it is not shared (not in the git repository).
+The program is in the if __name__ == '__main__': block
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import platform
+import tracemalloc
+import numpy as np
+import skimage
+import scipy
+from scipy import spatial
+from AFM_Functions import analyse_scan, find_holes_tiled, find_properties
+from AFM_Cache import StageCache
+
+#Parameters
+sizes = [256, 512, 1024] #size of the maps (px)
+densities = [2e-4, 1e-3] #number of holes per px
+radii = (3, 12) #radius of the holes (px)
+depths = (5, 30) #depth of the holes (nm)
+scaling = 4. #size of a pixel (nm)
+noise = .5 #standard deviation of the noise (nm)
+repeats = 3 #number of runs of each map, the fastest time is kept
+holes_parameters = dict(min_sigma=1, max_sigma=25, num_sigma=20, threshold=.1)
+time_tolerance = 1.2 #a stage is reported as slower if its time is more than 1.2 times the reference
+accuracy_tolerance = .02 #an accuracy is reported as lower if it decreases by more than .02
+
+def synthetic_scan(size, density, radii=(3, 12), depths=(5, 30), noise=.5, seed=0):
+    """
+    height map with holes at known positions (holes do not overlap and are inside the map)
+    input : size (px), density: number of holes per px, radii: range of the radius (px),
+            depths: range of the depth (nm), noise: standard deviation of the noise (nm), seed
+    output : height map (nm), holes: [:,0]=row [:,1]=column [:,2]=radius (px) [:,3]=depth (nm)
+    """
+    rng = np.random.default_rng(seed)
+    n_holes = int(density*size**2)
+    holes = []
+    for attempt in range(50*n_holes):
+        if len(holes) == n_holes:
+            break
+        radius = rng.uniform(*radii)
+        row, col = rng.uniform(radius+2, size-radius-2, 2)
+        if all((row-r)**2+(col-c)**2 > (radius+rd+2)**2 for r, c, rd, d in holes):
+            holes.append((row, col, radius, rng.uniform(*depths)))
+    holes = np.array(holes).reshape(-1, 4)
+
+    rows, cols = np.indices((size, size))
+    height = np.zeros((size, size))
+    for row, col, radius, depth in holes:
+        r0, r1 = int(row-radius), int(row+radius)+2
+        c0, c1 = int(col-radius), int(col+radius)+2
+        distance2 = ((rows[r0:r1, c0:c1]-row)**2 + (cols[r0:r1, c0:c1]-col)**2) / radius**2
+        height[r0:r1, c0:c1] -= depth*np.clip(1-distance2, 0, None)
+    #defects of the AFM: offset of each line, tilt and noise
+    height += rng.normal(0, 5, size)[:, None] + .01*cols + rng.normal(0, noise, (size, size))
+    return height, holes
+
+def load_synthetic(filename, channel=None):
+    """
+    loader of analyse_scan for the synthetic maps (.npy files, pixels of scaling nm)
+    """
+    return np.load(filename), scaling
+
+def measure(function, *args, **kwargs):
+    """
+    run an entry point of the analysis
+    output : its result, its peak memory (bytes, tracemalloc)
+    """
+    tracemalloc.reset_peak()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    result = function(*args, **kwargs)
+    return result, tracemalloc.get_traced_memory()[1]-start_memory
+
+def analyse_tiled(im_corrected, tile_size):
+    """
+    find_holes_tiled then find_properties, timed with the timing dictionary of find_holes_tiled
+    output : particules, {stage: time (s)}
+    """
+    start = time.time()
+    timing = {}
+    im_object = find_holes_tiled(im_corrected, tile_size=tile_size, timing=timing, **holes_parameters)
+    properties_start = time.time()
+    particules = find_properties(im_object, scaling, im_corrected)
+    timing['properties'] = time.time()-properties_start
+    timing['total'] = time.time()-start
+    return particules, timing
+
+def summary(runs, holes):
+    """
+    results of the repeats of an entry point: fastest time of each stage, largest peak memory,
+    accuracy of the first run
+    input : list of ((particules, timing), peak memory), true holes
+    """
+    particules = runs[0][0][0]
+    return dict(n_found=len(particules),
+                time={stage: min(run[0][1][stage] for run in runs) for stage in runs[0][0][1]},
+                memory=max(run[1] for run in runs), accuracy=accuracy(holes, particules, scaling))
+
+def accuracy(holes, particules, scaling):
+    """
+    comparison of the holes found with the true holes: a true hole is found if the center
+    of a region is in it (each region is matched with one true hole at most)
+    output : dictionary recall (fraction of the true holes found), precision (fraction of
+             the regions which are true holes), diameter_error and depth_error (mean relative
+             error on the matched holes)
+    """
+    if len(holes) == 0 or len(particules) == 0:
+        return dict(recall=float(len(holes) == 0), precision=float(len(particules) == 0),
+                    diameter_error=np.nan, depth_error=np.nan)
+    tree = spatial.cKDTree(holes[:, :2])
+    distance, nearest = tree.query(particules[:, :2])
+    matched = distance < holes[nearest, 2]
+    #one region per true hole: the closest one
+    order = np.argsort(distance)
+    first = np.zeros(len(particules), dtype=bool)
+    first[order[np.unique(nearest[order], return_index=True)[1]]] = True
+    matched &= first
+    truth = holes[nearest[matched]]
+    found = particules[matched]
+    return dict(recall=np.count_nonzero(matched)/len(holes),
+                precision=np.count_nonzero(matched)/len(particules),
+                diameter_error=float(np.mean(np.abs(found[:, 2]/(2*truth[:, 2]*scaling)-1))),
+                depth_error=float(np.mean(np.abs(found[:, 3]/-truth[:, 3]-1))))
+
+def benchmark(sizes, densities, repeats=3):
+    """
+    run all the cases
+    output : dictionary of the results (environment and list of the cases)
+    """
+    results = dict(date=time.strftime('%Y-%m-%d %H:%M:%S'), python=platform.python_version(),
+                   numpy=np.__version__, scipy=scipy.__version__, skimage=skimage.__version__,
+                   machine=platform.platform(), holes_parameters=holes_parameters, cases=[])
+    folder = tempfile.mkdtemp(prefix='AFM_benchmark_')
+    tracemalloc.start()
+    try:
+        for size in sizes:
+            for density in densities:
+                im, holes = synthetic_scan(size, density, radii, depths, noise)
+                filename = os.path.join(folder, 'synthetic_%d_%g.npy' % (size, density))
+                np.save(filename, im)
+                images = {}
+                runs = [measure(analyse_scan, filename, images=images, loader=load_synthetic,
+                                **holes_parameters) for i in range(repeats)]
+                methods = dict(analyse_scan=summary(runs, holes))
+                runs = [measure(analyse_tiled, images['im_corrected'], max(size//2, 128))
+                        for i in range(repeats)]
+                methods['tiled'] = summary(runs, holes)
+                #first run fills the cache, the next ones read it
+                cache = StageCache(os.path.join(folder, 'cache'))
+                analyse_scan(filename, cache=cache, loader=load_synthetic, **holes_parameters)
+                runs = [measure(analyse_scan, filename, cache=cache, loader=load_synthetic,
+                                **holes_parameters) for i in range(repeats)]
+                methods['cached'] = summary(runs, holes)
+                results['cases'].append(dict(size=size, density=density, n_holes=len(holes),
+                                             methods=methods))
+                for name, method in methods.items():
+                    print('%d px, %d holes, %s: %.3f s, %.1f MB, recall %.2f, precision %.2f' % (
+                        size, len(holes), name, method['time']['total'], method['memory']/2**20,
+                        method['accuracy']['recall'], method['accuracy']['precision']))
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+def compare(reference, results):
+    """
+    differences with a previous run: stages slower than time_tolerance times the reference
+    and accuracies lower than the reference by more than accuracy_tolerance
+    output : list of messages
+    """
+    messages = []
+    cases = {(case['size'], case['density']): case for case in reference['cases']}
+    for case in results['cases']:
+        old_case = cases.get((case['size'], case['density']))
+        if old_case is None:
+            continue
+        for method_name, method in case['methods'].items():
+            old = old_case['methods'].get(method_name)
+            if old is None:
+                continue
+            name = '%d px, density %g, %s: ' % (case['size'], case['density'], method_name)
+            for stage, duration in method['time'].items():
+                if stage in old['time'] and duration > time_tolerance*old['time'][stage]:
+                    messages.append(name+'%s %.3f s instead of %.3f s' % (stage, duration, old['time'][stage]))
+            for name_accuracy in ['recall', 'precision']:
+                if method['accuracy'][name_accuracy] < old['accuracy'][name_accuracy]-accuracy_tolerance:
+                    messages.append(name+'%s %.3f instead of %.3f' % (
+                        name_accuracy, method['accuracy'][name_accuracy], old['accuracy'][name_accuracy]))
+            for name_accuracy in ['diameter_error', 'depth_error']:
+                if method['accuracy'][name_accuracy] > old['accuracy'][name_accuracy]+accuracy_tolerance:
+                    messages.append(name+'%s %.3f instead of %.3f' % (
+                        name_accuracy, method['accuracy'][name_accuracy], old['accuracy'][name_accuracy]))
+    return messages
+
+if __name__ == '__main__':
+    results = benchmark(sizes, densities, repeats)
+    output = 'AFM_benchmark_'+time.strftime('%Y%m%d_%H%M%S')+'.json'
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=1)
+    print('Results in '+output)
+    reference = sys.argv[1] if len(sys.argv) > 1 else 'AFM_benchmark_reference.json'
+    if os.path.exists(reference):
+        with open(reference) as file:
+            messages = compare(json.load(file), results)
+        print('\n'.join(messages) if messages else 'No regression compared to '+reference)
+    else:
+        #first run on this computer: it becomes the reference
+        shutil.copyfile(output, reference)
+        print('Reference of this computer saved in '+reference)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+This file renders many figures without pyplot, for batch reports.
+A figure is described by a specification (a dictionary, see Render_Figure)
+and drawn on a matplotlib Figure which is not managed by pyplot: it uses the
+non-interactive Agg canvas (and the PDF canvas for pdf files), it is cleared
+as soon as it is saved and nothing is left in the pyplot state. The
+specifications are rendered in a pool of processes with Render_Figures.
+The graphs have the parameters of Init_Graphs and are set with Set_Graph and
+Draw_Colormap of Plot_Functions.py.
+This is exemplified in Test_Figure_Batch.py script.
+"""
+
+# Packages
+import os
+import concurrent.futures  # pool of processes
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import Plot_Functions as pf
+
+
+def New_Figure(Figsize=None):
+    """
+    This function returns a figure attached to an Agg canvas and not managed
+    by pyplot: it does not need a display and it is freed when it is not
+    used anymore (no plt.close needed).
+    Figsize is the size of the figure in inches, by default the one of
+    Init_Graphs (rcParams).
+    """
+    Fig = Figure(figsize=Figsize)
+    FigureCanvasAgg(Fig)
+    return Fig
+
+
+def Draw_Curves(Fig, Spec):
+    """
+    Draws the curves of a specification ('Kind': 'Curves', the default).
+    Spec['Curves'] is a list of dictionaries with 'X', 'Y' and optionally
+    'Style' (e.g. '-o'), 'Label' and any keyword of matplotlib plot (color,
+    mfc...). Curves with millions of points can have 'Decimate': True, they
+    are then drawn with Plot_Decimated. If Spec['Color_Map_Name'] is given, the curves without color are
+    colored with Get_Color_Map. Spec['X_Scale'] and Spec['Y_Scale'] can be
+    'log'. Title, X_Label, Y_Label and Legends_Position are given to Set_Graph.
+    """
+    Axes = Fig.add_subplot(111)
+    Curves = Spec['Curves']
+    if Spec.get('Color_Map_Name'):
+        Colors = pf.Get_Color_Map(Spec['Color_Map_Name'], len(Curves))/255.
+    Axes.set_xscale(Spec.get('X_Scale', 'linear'))
+    Axes.set_yscale(Spec.get('Y_Scale', 'linear'))
+    Plots = []
+    for i, Curve in enumerate(Curves):
+        Options = {Key: Value for Key, Value in Curve.items()
+                   if Key not in ('X', 'Y', 'Style', 'Label', 'Decimate')}
+        if Spec.get('Color_Map_Name') and 'color' not in Options:
+            Options['color'] = Colors[i]
+        if Curve.get('Decimate'):
+            Plots.append(pf.Plot_Decimated(Curve['X'], Curve['Y'], Curve.get('Style', '-'),
+                                           Axes=Axes, **Options))
+        else:
+            Plots.append(Axes.plot(Curve['X'], Curve['Y'], Curve.get('Style', '-'),
+                                   **Options)[0])
+    Labels = [Curve.get('Label', '') for Curve in Curves]
+    pf.Set_Graph(Plots, Title=Spec.get('Title', ''),
+                 X_Label=Spec.get('X_Label', ''), Y_Label=Spec.get('Y_Label', ''),
+                 Legends_Names=Labels if any(Labels) else [],
+                 Legends_Position=Spec.get('Legends_Position', 'best'), Axes=Axes)
+
+
+def Draw_Image(Fig, Spec):
+    """
+    Draws the image of a specification ('Kind': 'Colormap') with
+    Draw_Colormap. Spec['Image'] is the image, the other keys are the
+    arguments of Draw_Colormap (Extrema, Title, Colorbar_Title...).
+    """
+    Options = {Key: Value for Key, Value in Spec.items()
+               if Key in ('Extrema', 'Title', 'X_Label', 'Y_Label', 'Colorbar_Label',
+                          'Colorbar_Title', 'Color_Map_Name')}
+    pf.Draw_Colormap(Spec['Image'], Axes=Fig.add_subplot(111), **Options)
+
+
+Drawers = {'Curves': Draw_Curves, 'Colormap': Draw_Image}
+
+
+def Render_Figure(Spec, Save_Dir='.'):
+    """
+    Renders one figure and saves it.
+    Spec is a dictionary with:
+    - 'Name': name of the files without extension
+    - 'Kind': 'Curves' (Draw_Curves), 'Colormap' (Draw_Image) or a function
+      Draw(Fig, Spec) drawing on the figure (it must be defined at the top
+      level of a module to be sent to the processes)
+    - 'Formats': list of extensions, ['pdf'] by default (see Export_Figure)
+    - 'Dpi': resolution of the bitmap files, savefig.dpi by default
+    - 'Rasterize', 'Raster_Dpi': reduction of the heavy artists in the
+      vectorial files, True and 150 by default (see Export_Figure)
+    - 'Figsize': size in inches, the one of Init_Graphs by default
+    - the data and texts of the figure (see Draw_Curves and Draw_Image)
+    Save_Dir is the folder of the files.
+    The output is the list of the files saved. The figure is cleared at the
+    end, even if drawing fails.
+    """
+    Fig = New_Figure(Spec.get('Figsize'))
+    try:
+        Draw = Spec.get('Kind', 'Curves')
+        if isinstance(Draw, str):
+            Draw = Drawers[Draw]
+        Draw(Fig, Spec)
+        Save_Name = os.path.join(Save_Dir, Spec['Name'])
+        Files = pf.Export_Figure(Fig, Save_Name, Spec.get('Formats', ['pdf']),
+                                 Dpi=Spec.get('Dpi'), Rasterize=Spec.get('Rasterize', True),
+                                 Raster_Dpi=Spec.get('Raster_Dpi', 150))
+    finally:
+        Fig.clear()
+    return Files
+
+
+def Init_Worker(UseTeX=False, Serif=False):
+    """
+    Initialisation of each process of Render_Figures: non-interactive
+    backend and parameters of Init_Graphs.
+    """
+    matplotlib.use('Agg', force=True)
+    pf.Init_Graphs(UseTeX=UseTeX, Serif=Serif)
+
+
+def Render_Figures(Specs, Save_Dir='.', N_Processes=None, UseTeX=False,
+                   Serif=False, Max_Pending=None):
+    """
+    Renders a list of figure specifications (see Render_Figure) in a pool of
+    processes, one figure at a time in each process.
+    Inputs:
+    - Specs: list or iterator of specifications. With an iterator (a
+      generator for example), the data of the figures are created while the
+      figures are rendered.
+    - Save_Dir: folder of the files.
+    - N_Processes: number of processes, by default the number of cores. With
+      1, the figures are rendered in this process (the parameters of
+      Init_Graphs are then restored at the end).
+    - UseTeX, Serif: parameters of Init_Graphs.
+    - Max_Pending: maximum number of specifications sent to the processes and
+      not rendered yet, 2 per process by default: it bounds the memory used
+      by the data of the figures.
+    The output is the list of the files saved for each specification, in the
+    order of Specs.
+    """
+    os.makedirs(Save_Dir, exist_ok=True)
+    if N_Processes == 1:
+        with matplotlib.rc_context():
+            pf.Init_Graphs(UseTeX=UseTeX, Serif=Serif)
+            return [Render_Figure(Spec, Save_Dir) for Spec in Specs]
+
+    if N_Processes is None:
+        N_Processes = os.cpu_count() or 1
+    if Max_Pending is None:
+        Max_Pending = 2*N_Processes
+    Results = {}
+    Pending = set()
+    with concurrent.futures.ProcessPoolExecutor(
+            N_Processes, initializer=Init_Worker, initargs=(UseTeX, Serif)) as Pool:
+        for i, Spec in enumerate(Specs):
+            if len(Pending) >= Max_Pending:
+                Pending = concurrent.futures.wait(
+                    Pending, return_when=concurrent.futures.FIRST_COMPLETED)[1]
+            Future = Pool.submit(Render_Figure, Spec, Save_Dir)
+            Pending.add(Future)
+            Results[i] = Future
+        return [Results[i].result() for i in range(len(Results))]
@@ -7,13 +7,22 @@ Theses functions are exemplified in Test_UseTeX_Colormap.py script.
 """
 
 # Packages
+import contextlib
+import functools  # cache of the colors
+import io
+import os
+import concurrent.futures  # figures exported in parallel
 import numpy as np  # scientific computation
+import matplotlib
 from matplotlib import pyplot as plt  # plots
+from matplotlib.figure import Figure
+from matplotlib._pylab_helpers import Gcf  # figures of pyplot
 from matplotlib.backends.backend_pdf import PdfPages
 # to save several graphs in one pdf
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 # useful to adjust the colorbar of colormaps
 import skimage  # images
+import PIL.Image  # bitmap formats
 
 
 def Get_Color_Map(Color_Map_Name, N_Data=256):
@@ -26,12 +35,39 @@ def Get_Color_Map(Color_Map_Name, N_Data=256):
     N_Data is a interger, corresponding to the number of different colors you
     want, equal to 256 by default.
     The output is a uint8 bidimensional numpy array.
+    The colors of a colormap name are computed once for each N_Data and kept
+    in a cache (Color_Map_Table), a copy is returned.
     """
-    Color_Map = plt.get_cmap(Color_Map_Name, N_Data)
-    Colors = np.array([list(Color_Map(i)[0:3]) for i in range(N_Data)])
+    if isinstance(Color_Map_Name, str):
+        return Color_Map_Table(Color_Map_Name, N_Data).copy()
+    return Sample_Color_Map(Color_Map_Name, N_Data)
+
+
+def Sample_Color_Map(Color_Map_Name, N_Data):
+    """
+    This function evaluates the N_Data colors of the colormap at once (see
+    Get_Color_Map). Color_Map_Name can also be a matplotlib colormap, it is
+    then resampled to N_Data colors.
+    """
+    if isinstance(Color_Map_Name, matplotlib.colors.Colormap):
+        Color_Map = Color_Map_Name.resampled(N_Data)
+    else:
+        Color_Map = plt.get_cmap(Color_Map_Name, N_Data)
+    Colors = Color_Map(np.arange(N_Data))[:, 0:3]
     return skimage.img_as_ubyte(Colors)
 
 
+@functools.lru_cache(maxsize=128)
+def Color_Map_Table(Color_Map_Name, N_Data):
+    """
+    Cached Sample_Color_Map for colormap names: the 128 last (name, N_Data)
+    used are kept. The output is read-only, Get_Color_Map returns a copy.
+    """
+    Colors = Sample_Color_Map(Color_Map_Name, N_Data)
+    Colors.setflags(write=False)
+    return Colors
+
+
 def SaintGobain_Colors():
     Turquoise = np.array([103., 185., 176.])/255.
     Blue = np.array([33., 156., 220.])/255.
@@ -47,24 +83,39 @@ def Interpolate_Colors(N_Data, Colors):
     """
     This function returns a specified number of colors, linearly
     distributed, extrapolated between the specified colors.
-    The output is a bidimensional list.
+    The output is a bidimensional numpy array (one color per line).
     Inputs: N_Data is the number of different color you want. Colors is a list
     or numpy array of the colors (3 elements tuple, list or numpy array)
     between which you want interpolate. N_Data can be either smaller or larger
     than the Colors list length.
+    The result for given colors and N_Data is computed once and kept in a
+    cache (Interpolated_Colors_Table), a copy is returned.
     """
     if N_Data < 2:
         return Colors[0]
     else:
-        N_Colors = len(Colors)
-        Data_Color_Index = np.arange(N_Data) * float(N_Colors-1) / float(N_Data-1)
-        Data_Color_Index_0 = np.floor(Data_Color_Index).astype(int)
-        Delta_Data_Color = Data_Color_Index - Data_Color_Index_0
-        Colors = np.concatenate((Colors, Colors[-1].reshape(1, 3)), axis=0)
+        Colors_Key = tuple(tuple(float(c) for c in Color) for Color in Colors)
+        return Interpolated_Colors_Table(N_Data, Colors_Key).copy()
 
-        Colors_Inter = [(1 - DDC) * Colors[DCI0] + DDC * Colors[DCI0+1]
-                        for DDC, DCI0 in zip(Delta_Data_Color, Data_Color_Index_0)]
-        return Colors_Inter
+
+@functools.lru_cache(maxsize=128)
+def Interpolated_Colors_Table(N_Data, Colors):
+    """
+    Cached interpolation of Interpolate_Colors, for all the N_Data colors at
+    once. Colors is a tuple of colors (tuples), the 128 last (N_Data, Colors)
+    used are kept. The output is read-only, Interpolate_Colors returns a copy.
+    """
+    Colors = np.array(Colors)
+    N_Colors = len(Colors)
+    Data_Color_Index = np.arange(N_Data) * float(N_Colors-1) / float(N_Data-1)
+    Data_Color_Index_0 = np.floor(Data_Color_Index).astype(int)
+    Delta_Data_Color = (Data_Color_Index - Data_Color_Index_0)[:, np.newaxis]
+    Colors = np.concatenate((Colors, Colors[-1:]), axis=0)
+
+    Colors_Inter = ((1 - Delta_Data_Color) * Colors[Data_Color_Index_0] +
+                    Delta_Data_Color * Colors[Data_Color_Index_0+1])
+    Colors_Inter.setflags(write=False)
+    return Colors_Inter
 
 
 def Init_Graphs(UseTeX=False, Serif=False):
@@ -82,7 +133,8 @@ def Init_Graphs(UseTeX=False, Serif=False):
     # Choice of font
     # ------------ #
     plt.rcParams['text.usetex'] = UseTeX  # tells matplotlib to use TeX
-    plt.rcParams['text.latex.unicode'] = UseTeX  # allows some unicode symbols
+    if 'text.latex.unicode' in plt.rcParams:  # removed in matplotlib 3 (always on)
+        plt.rcParams['text.latex.unicode'] = UseTeX  # allows some unicode symbols
     if UseTeX:
         if Serif:
             plt.rcParams['text.latex.preamble'] = [r'\usepackage[squaren,Gray]{SIunits}']
@@ -175,8 +227,111 @@ def Init_Graphs(UseTeX=False, Serif=False):
     plt.rc('savefig', bbox='tight', transparent=True, dpi=300)
 
 
+def Decimate_Curve(X, Y, Edges):
+    """
+    This function reduces a curve with many points to the points which are
+    visible once drawn: the abscissa is cut in buckets (one per pixel column)
+    and only the first, last, minimal and maximal points of each bucket are
+    kept, in their order. The line drawn with these points covers the same
+    pixels as the full curve, peaks included.
+    Inputs:
+    - X: abscissa of the curve, sorted in increasing order.
+    - Y: ordinates of the curve, same length as X. NaN are ignored.
+    - Edges: sorted limits of the buckets along X (N_Buckets + 1 values). The
+      points before the first edge and after the last one are dropped, except
+      the nearest ones, so that the line still reaches the border of the axes.
+    The outputs are the abscissa and ordinates of the points kept (the
+    points in the edges if there are less than 4 per bucket).
+    """
+    X = np.asarray(X)
+    Y = np.asarray(Y)
+    Start = max(np.searchsorted(X, Edges[0]) - 1, 0)
+    Stop = min(np.searchsorted(X, Edges[-1], side='right') + 1, len(X))
+    X = X[Start:Stop]
+    Y = Y[Start:Stop]
+    Bounds = np.unique(np.concatenate(([0], np.searchsorted(X, Edges), [len(X)])))
+    Starts = Bounds[:-1]
+    if len(X) <= 4*len(Starts):
+        return X, Y
+    Counts = np.diff(Bounds)
+    Kept = [Starts, Bounds[1:] - 1]
+    for Reduce in (np.fmin, np.fmax):
+        # first point of each bucket equal to its extremum
+        Hits = np.flatnonzero(Y == np.repeat(Reduce.reduceat(Y, Starts), Counts))
+        Kept.append(Hits[np.unique(np.searchsorted(Bounds, Hits, side='right'),
+                                   return_index=True)[1]])
+    Kept = np.unique(np.concatenate(Kept))
+    return X[Kept], Y[Kept]
+
+
+def Plot_Decimated(X, Y, Style='-', Axes=None, **Options):
+    """
+    This function plots a curve with millions of points (time series,
+    profiles...) as fast as a small one: only the points visible at the
+    resolution of the axes are given to matplotlib (see Decimate_Curve),
+    with one bucket per pixel column at the largest resolution between the
+    screen (figure dpi) and the saved files (savefig.dpi of Init_Graphs).
+    The curve is decimated again when the x limits (zoom, pan, set_xlim) or
+    the size of the figure change, so zooming shows the details.
+    Inputs:
+    - X: abscissa sorted in increasing order, or None for 0, 1, 2...
+    - Y: ordinates.
+    - Style: format of plt.plot, e.g. '-' or '--'. Markers would be drawn only
+      on the kept points.
+    - Axes: matplotlib axes, by default the current axes of pyplot.
+    - Options: other keywords of plt.plot (color, label, lw...), for example
+      color=Get_Color_Map('viridis', N)[i]/255.
+    The output is the matplotlib line, which can be given to Set_Graph. The
+    full data are kept in Line.Full_Data.
+    """
+    if Axes is None:
+        Axes = plt.gca()
+    Y = np.asarray(Y)
+    X = np.arange(len(Y)) if X is None else np.asarray(X)
+    if len(X) > 1 and np.any(X[1:] < X[:-1]):
+        raise ValueError('Plot_Decimated: X must be sorted in increasing order')
+
+    def Edges(Limits):
+        # bucket limits along X, one per pixel column of the axes
+        Fig = Axes.figure
+        Scale = max(Fig.dpi, plt.rcParams['savefig.dpi']
+                    if plt.rcParams['savefig.dpi'] != 'figure' else Fig.dpi)/Fig.dpi
+        Width = max(int(np.ceil(Axes.bbox.width*Scale)), 1)
+        Ends = Axes.transData.transform([(min(Limits), 0), (max(Limits), 0)])[:, 0]
+        Pixels = np.linspace(Ends[0], Ends[1], Width + 1)
+        return Axes.transData.inverted().transform(
+            np.column_stack((Pixels, np.zeros_like(Pixels))))[:, 0]
+
+    if len(X):
+        # the first decimation uses the whole curve, its extrema set the limits
+        Decimated = Decimate_Curve(X, Y, np.linspace(X[0], X[-1], max(
+            int(np.ceil(Axes.bbox.width)), 1) + 1))
+    else:
+        Decimated = (X, Y)
+    Line, = Axes.plot(*Decimated, Style, **Options)
+    Line.Full_Data = (X, Y)
+    if len(X):
+        # limits of the full curve, smallest positive values for log scales
+        Positive_X = X[min(np.searchsorted(X, 0, side='right'), len(X) - 1)]
+        Positive_Y = Y[Y > 0]
+        Positive_Y = np.nanmin(Positive_Y) if len(Positive_Y) else np.nan
+        Axes.update_datalim([(X[0], np.nanmin(Y)), (X[-1], np.nanmax(Y)),
+                             (Positive_X, Positive_Y)])
+
+    def Update(*args):
+        if Line.axes is None or not len(X):
+            return
+        Edge = Edges(Axes.get_xlim())
+        Line.set_data(*Decimate_Curve(X, Y, np.sort(Edge)))
+
+    Axes.callbacks.connect('xlim_changed', Update)
+    if Axes.figure.canvas is not None:
+        Axes.figure.canvas.mpl_connect('resize_event', Update)
+    return Line
+
+
 def Set_Graph(Plots, Title='', X_Label='', Y_Label='', Legends_Names=[],
-              Legends_Position='best'):
+              Legends_Position='best', Axes=None):
     """
     After having plotted your data, this function sets all the
     parameters.
@@ -184,24 +339,28 @@ def Set_Graph(Plots, Title='', X_Label='', Y_Label='', Legends_Names=[],
     figure, you can omit the data sets for which you do not want legend.
     Title, X_Lable, Y_Label and Legends_Position are self-explanatory.
     Legends_Names is a list of strings having the same length as Plots.
+    Axes is the matplotlib axes of the graph, by default the current axes of
+    pyplot (plt.gca()). Giving it allows to use figures which are not
+    managed by pyplot (see Figure_Batch.py).
     """
+    if Axes is None:
+        Axes = plt.gca()
     if Title:
-        plt.title(Title, y=1.04)
+        Axes.set_title(Title, y=1.04)
     if X_Label:
-        plt.xlabel(X_Label)
+        Axes.set_xlabel(X_Label)
     if Y_Label:
-        plt.ylabel(Y_Label)
+        Axes.set_ylabel(Y_Label)
     if Legends_Names:
         [P.set_label(LN) for P, LN in zip(Plots, Legends_Names)]
-        plt.legend()
-        plt.rc('legend', loc=Legends_Position)
+        Axes.legend(loc=Legends_Position)
     """
     Possible location for the legends: 'upper left', 'center', 'upper center',
     'lower left', 'lower right', 'center left', 'upper right', 'right',
     'lower center', 'center right' and 'best'.
     """
 
-    plt.tight_layout(pad=0.)  # adjusts figures to suppress blank.
+    Axes.figure.tight_layout(pad=0.)  # adjusts figures to suppress blank.
 
     """
     # Optionnal lines about ticks
@@ -224,7 +383,7 @@ def Set_Graph(Plots, Title='', X_Label='', Y_Label='', Legends_Names=[],
 
 def Draw_Colormap(Image, Extrema=False, Title=False, X_Label=False,
                   Y_Label=False, Colorbar_Label=False, Colorbar_Title=False,
-                  Color_Map_Name='magma'):
+                  Color_Map_Name='magma', Axes=None):
     """
     Plots an image with the specified colormap.
     Colorbar label is a text longside the colorbar, whereas its title is above.
@@ -234,28 +393,31 @@ def Draw_Colormap(Image, Extrema=False, Title=False, X_Label=False,
     colorbar title and label are not compatible for now.
     Extrema are the min and max values you want on your map: values below and
     above will be drawn as they were equal to the min and max values.
+    Axes is the matplotlib axes of the graph, by default the current axes of
+    pyplot (as in Set_Graph).
     """
-    plt.set_cmap(Color_Map_Name)  # set the colormap
-    Axes = plt.gca()
+    if Axes is None:
+        Axes = plt.gca()
 
-    # Plots
+    # Plots with the colormap
     if Extrema:
-        Im = Axes.imshow(Image, vmin=Extrema[0], vmax=Extrema[1])
+        Im = Axes.imshow(Image, cmap=Color_Map_Name, vmin=Extrema[0],
+                         vmax=Extrema[1])
     else:
-        Im = Axes.imshow(Image)
+        Im = Axes.imshow(Image, cmap=Color_Map_Name)
 
     # Colormap title and labels
     if Title:
-        plt.title(Title, y=1.04)
+        Axes.set_title(Title, y=1.04)
     if X_Label:
-        plt.xlabel(X_Label)
+        Axes.set_xlabel(X_Label)
     if Y_Label:
-        plt.ylabel(Y_Label)
+        Axes.set_ylabel(Y_Label)
 
     # Color bar at the right size and place
     divider = make_axes_locatable(Axes)
     cax = divider.append_axes("right", size="5%", pad=0.05)
-    Colorbar = plt.colorbar(Im, cax=cax)
+    Colorbar = Axes.figure.colorbar(Im, cax=cax)
 
     # Colorbar label or title
     if Colorbar_Label:
@@ -269,7 +431,7 @@ def Draw_Colormap(Image, Extrema=False, Title=False, X_Label=False,
         figure size.
         """
 
-    plt.tight_layout(pad=0.)  # adjusts figures to suppress blank.
+    Axes.figure.tight_layout(pad=0.)  # adjusts figures to suppress blank.
 
     # Ticks
     """
@@ -291,7 +453,209 @@ def Draw_Colormap(Image, Extrema=False, Title=False, X_Label=False,
     Colorbar.ax.tick_params(direction='out')
 
 
-def Save_Graphs(Do_Save, Save_Name, Figure_List=False, PNG=False):
+def Heavy_Artists(Fig, Max_Points=10000):
+    """
+    This function returns the artists of a figure which are heavy in vectorial
+    files: images (imshow, pcolormesh...) with more than Max_Points pixels,
+    collections (scatter...) and curves with more than Max_Points points.
+    """
+    Heavy = []
+    for Artist in Fig.findobj():
+        if isinstance(Artist, matplotlib.image._ImageBase):
+            Array = Artist.get_array()
+            Size = 0 if Array is None else np.size(Array)
+        elif isinstance(Artist, matplotlib.collections.QuadMesh):
+            Size = np.size(Artist.get_array())
+        elif isinstance(Artist, matplotlib.collections.Collection):
+            Size = max(len(Artist.get_offsets()), len(Artist.get_paths()))
+        elif isinstance(Artist, matplotlib.lines.Line2D):
+            Size = len(Artist.get_xydata())
+        else:
+            continue
+        if Size > Max_Points:
+            Heavy.append(Artist)
+    return Heavy
+
+
+def Get_Dpi(Fig, Dpi=None):
+    """
+    Returns Dpi, or savefig.dpi by default (the dpi of Fig if it is 'figure').
+    """
+    if Dpi is None:
+        Dpi = plt.rcParams['savefig.dpi']
+    return Fig.dpi if Dpi == 'figure' else Dpi
+
+
+@contextlib.contextmanager
+def Rasterized_Heavy_Artists(Figures, Max_Points=10000):
+    """
+    Within this context, the heavy scatters, pcolormesh and curves of the
+    figures (see Heavy_Artists) are rasterized in vectorial files (pdf, svg,
+    eps): they are drawn as an image at the dpi given to savefig, the axes,
+    texts and light curves stay vectorial. The images (imshow) are already
+    resampled at this dpi by the vectorial backends, they are left as they
+    are. The previous state is restored at the end.
+    """
+    Previous = [(Artist, Artist.get_rasterized()) for Fig in Figures
+                for Artist in Heavy_Artists(Fig, Max_Points)
+                if not isinstance(Artist, matplotlib.image.AxesImage)]
+    try:
+        for Artist, State in Previous:
+            Artist.set_rasterized(True)
+        yield
+    finally:
+        for Artist, State in Previous:
+            Artist.set_rasterized(State)
+
+
+Bitmap_Formats = ('png', 'jpg', 'jpeg', 'tif', 'tiff', 'bmp', 'webp')
+
+
+def Export_Figure(Fig, Save_Name, Formats=('pdf',), Dpi=None, Rasterize=True,
+                  Max_Points=10000, Raster_Dpi=150):
+    """
+    This function saves one figure in several formats.
+    Inputs:
+    - Fig: matplotlib figure.
+    - Save_Name: name of the files without the extention.
+    - Formats: list of extensions. The figure is rendered once for all the
+      bitmap formats (png, jpg, tif...): the png render is converted to the
+      other ones. The vectorial formats (pdf, svg, eps) are rendered by their
+      own backend.
+    - Dpi: resolution of the bitmap files, savefig.dpi by default.
+    - Rasterize, Max_Points: if Rasterize is True, the heavy scatters and
+      curves are rasterized in the vectorial files (see
+      Rasterized_Heavy_Artists).
+    - Raster_Dpi: dpi of the vectorial files, i.e. resolution of their
+      images (imshow, Draw_Colormap) and rasterized artists. It is lower than
+      Dpi by default to keep them small, Raster_Dpi=None uses Dpi.
+    The output is the list of the files saved.
+    """
+    Dpi = Get_Dpi(Fig, Dpi)
+    Raster_Dpi = Get_Dpi(Fig, Dpi if Raster_Dpi is None else Raster_Dpi)
+    Files = []
+    Render = None
+    for Format in Formats:
+        if Format.lower() not in Bitmap_Formats:
+            continue
+        File_Name = Save_Name + '.' + Format
+        if Render is None:
+            Buffer = io.BytesIO()
+            Fig.savefig(Buffer, format='png', dpi=Dpi)
+            Render = PIL.Image.open(Buffer)
+        if Format.lower() == 'png':
+            with open(File_Name, 'wb') as File:
+                File.write(Buffer.getvalue())
+        else:
+            Image = Render
+            if Format.lower() in ('jpg', 'jpeg', 'bmp'):
+                # formats without transparency
+                Image = Blend_Background(Render)
+            Image.save(File_Name, dpi=(Dpi, Dpi))
+        Files.append(File_Name)
+    Vectorial = [Format for Format in Formats if Format.lower() not in Bitmap_Formats]
+    if Vectorial:
+        with contextlib.ExitStack() as Stack:
+            if Rasterize:
+                Stack.enter_context(Rasterized_Heavy_Artists([Fig], Max_Points))
+            for Format in Vectorial:
+                Fig.savefig(Save_Name + '.' + Format, dpi=Raster_Dpi)
+                Files.append(Save_Name + '.' + Format)
+    return Files
+
+
+def Blend_Background(Render):
+    """
+    Returns the RGB image of a transparent render (savefig.transparent of
+    Init_Graphs) on the savefig facecolor, as matplotlib does for jpg files.
+    """
+    if Render.mode != 'RGBA':
+        return Render.convert('RGB')
+    Color = plt.rcParams['savefig.facecolor']
+    if Color == 'auto':
+        Color = plt.rcParams['figure.facecolor']
+    Background = PIL.Image.new('RGBA', Render.size, tuple(
+        int(round(255*C)) for C in matplotlib.colors.to_rgb(Color)) + (255,))
+    return PIL.Image.alpha_composite(Background, Render).convert('RGB')
+
+
+def Get_Figures(Figure_List=False):
+    """
+    Returns the figures of Figure_List (numbers or figures), or the current
+    figure if Figure_List is False, without changing the current figure.
+    """
+    if not Figure_List:
+        return [plt.gcf()]
+    Managers = {Manager.num: Manager for Manager in Gcf.get_all_fig_managers()}
+    return [Managers[FL].canvas.figure if not isinstance(FL, Figure) else FL
+            for FL in Figure_List]
+
+
+def Export_Figures(Figures, Save_Name, Formats=('pdf',), Dpi=None,
+                   Single_PDF=True, Rasterize=True, Max_Points=10000,
+                   Raster_Dpi=150, N_Threads=None, Numbered=None):
+    """
+    This function saves several figures in several formats. The files of
+    each figure (png, jpg, svg, one pdf per figure...) are written by a
+    thread, several figures at the same time: the drawing of matplotlib
+    mostly keeps the other threads waiting (GIL), the gain comes from the
+    compression and the writing of the files, which run in parallel. The
+    multi-page pdf (Single_PDF) is written afterwards, figure by figure.
+    Matplotlib is not documented as thread-safe: a figure is only used by
+    one thread, and N_Threads=1 exports everything in this thread.
+    Inputs:
+    - Figures: list of matplotlib figures.
+    - Save_Name: name of the files without the extention. Each figure is
+      saved in Save_Name_<number of the figure>.<format>, or in
+      Save_Name.<format> if Numbered is False (by default, when there is only
+      one figure).
+    - Formats, Dpi, Rasterize, Max_Points, Raster_Dpi: see Export_Figure.
+    - Single_PDF: if True, the figures are saved together in Save_Name.pdf
+      (one page per figure) instead of one pdf per figure.
+    - N_Threads: number of figures exported at the same time, by default the
+      number of cores (os.cpu_count()), at most the number of figures.
+    The output is the list of the files saved.
+    """
+    if Numbered is None:
+        Numbered = len(Figures) > 1
+    Formats = list(Formats)
+    Together = Single_PDF and 'pdf' in Formats and Numbered
+    if Together:
+        Formats.remove('pdf')
+    Names = [Save_Name + '_' + str(getattr(Fig, 'number', i + 1)) if Numbered
+             else Save_Name
+             for i, Fig in enumerate(Figures)]
+    if N_Threads is None:
+        N_Threads = os.cpu_count() or 1
+    N_Threads = max(min(N_Threads, len(Figures)), 1)
+
+    def Export(Fig, Name):
+        return Export_Figure(Fig, Name, Formats, Dpi, Rasterize, Max_Points,
+                             Raster_Dpi)
+
+    Files = []
+    if Formats and N_Threads == 1:
+        for Fig, Name in zip(Figures, Names):
+            Files += Export(Fig, Name)
+    elif Formats:
+        with concurrent.futures.ThreadPoolExecutor(N_Threads) as Pool:
+            for Saved in Pool.map(Export, Figures, Names):
+                Files += Saved
+    if Together:
+        if Raster_Dpi is None:
+            Raster_Dpi = Dpi
+        with contextlib.ExitStack() as Stack:
+            if Rasterize:
+                Stack.enter_context(Rasterized_Heavy_Artists(Figures, Max_Points))
+            with PdfPages(Save_Name + '.pdf') as pp:
+                for Fig in Figures:
+                    pp.savefig(Fig, dpi=Get_Dpi(Fig, Raster_Dpi))
+        Files.insert(0, Save_Name + '.pdf')
+    return Files
+
+
+def Save_Graphs(Do_Save, Save_Name, Figure_List=False, PNG=False, Dpi=None,
+                Rasterize=True, Raster_Dpi=150):
     """
     I like to have vectorial graphs so I save my graphs in PDF files. Python
     allows you to save several graph in one file, which I find practical.
@@ -306,43 +670,31 @@ def Save_Graphs(Do_Save, Save_Name, Figure_List=False, PNG=False):
       is set at False, in this case it will just save the last figure.
     - PNG is a boolean, if set on true, the function saves the graph twice, in
       PDF and PNG.
+    - Dpi: resolution of the PNG files, savefig.dpi by default.
+    - Raster_Dpi: resolution of the images (Draw_Colormap) in the PDF file,
+      150 by default, Raster_Dpi=None uses Dpi.
+    - Rasterize: if True, the dense scatters and curves are rasterized at
+      Raster_Dpi in the PDF file (see Rasterized_Heavy_Artists).
     """
     if Do_Save:
-        if not Figure_List:
-            plt.savefig(Save_Name + '.pdf')
-            if PNG:
-                plt.savefig(Save_Name + '.png')
-        else:
-            with PdfPages(Save_Name + '.pdf') as pp:
-                [pp.savefig(FL) for FL in Figure_List]
-            if PNG:
-                for FL in Figure_List:
-                    plt.figure(FL)
-                    plt.savefig(Save_Name + '_' + str(FL) + '.png')
+        Export_Figures(Get_Figures(Figure_List), Save_Name,
+                       ['pdf', 'png'] if PNG else ['pdf'], Dpi=Dpi,
+                       Rasterize=Rasterize, Raster_Dpi=Raster_Dpi,
+                       Numbered=bool(Figure_List))
 
 
-def Save_Graphs_wo_title(Do_Save, Save_Name, Figure_List=False, PNG=False):
+def Save_Graphs_wo_title(Do_Save, Save_Name, Figure_List=False, PNG=False,
+                         Dpi=None, Rasterize=True, Raster_Dpi=150):
     """
     This function saves figures in the same manner than Save_Graphs but
     deletes the title before: titles are convenient when you look at the graphs,
     but you do not need it anymore when you put it in a presentation or report.
     """
     if Do_Save:
-        Save_Name = Save_Name
-        if not Figure_List:
-            plt.gcf().axes[0].title.set_text('')
-            plt.tight_layout(pad=0.)
-            plt.savefig(Save_Name + '.pdf')
-            if PNG:
-                plt.savefig(Save_Name + '.png')
-        else:
-            for FL in Figure_List:
-                Fig = plt.figure(FL)
-                Fig.axes[0].title.set_text('')
-                plt.tight_layout(pad=0.)
-            with PdfPages(Save_Name + '.pdf') as pp:
-                [pp.savefig(FL) for FL in Figure_List]
-            if PNG:
-                for FL in Figure_List:
-                    plt.figure(FL)
-                    plt.savefig(Save_Name + '_' + str(FL) + '.png')
+        Figures = Get_Figures(Figure_List)
+        for Fig in Figures:
+            Fig.axes[0].title.set_text('')
+            Fig.tight_layout(pad=0.)
+        Export_Figures(Figures, Save_Name, ['pdf', 'png'] if PNG else ['pdf'],
+                       Dpi=Dpi, Rasterize=Rasterize, Raster_Dpi=Raster_Dpi,
+                       Numbered=bool(Figure_List))
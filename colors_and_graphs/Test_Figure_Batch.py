@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+This script is a minimal working exemple of Figure_Batch.py: it renders
+figures described by specifications in a pool of processes, without pyplot.
+Because of the processes, run it in a new console or with
+'python Test_Figure_Batch.py', the program is in the
+if __name__ == '__main__': block.
+"""
+
+import time
+import numpy as np
+import imageio
+import Figure_Batch as fb
+
+# --- Parameters to choose --- #
+
+Save_Dir = 'figure_batch_test'
+N_Figures = 40
+N_Processes = None  # None = number of cores
+
+
+def Specifications(N_Figures):
+    """
+    Specifications of the figures, created one by one when Render_Figures
+    needs them (generator).
+    """
+    X = np.linspace(0, 10, 1000)
+    Image = imageio.imread('dewetting.jpg')
+    for i in range(N_Figures):
+        if i % 4 == 3:
+            yield {'Name': 'colormap_%03d' % i, 'Kind': 'Colormap',
+                   'Image': Image, 'Extrema': [130, 200], 'Title': 'Colormap %d' % i,
+                   'Colorbar_Label': 'thickness', 'Color_Map_Name': 'GnBu',
+                   'Formats': ['pdf', 'png']}
+        else:
+            yield {'Name': 'curves_%03d' % i, 'Title': 'Curves %d' % i,
+                   'X_Label': 'time', 'Y_Label': 'signal',
+                   'Curves': [{'X': X, 'Y': np.sin(X*(1+k/10.)) + k, 'Label': str(k)}
+                              for k in range(10)],
+                   'Color_Map_Name': 'viridis', 'Formats': ['pdf', 'png']}
+
+
+if __name__ == '__main__':
+    Start = time.time()
+    Files = fb.Render_Figures(Specifications(N_Figures), Save_Dir,
+                              N_Processes=N_Processes)
+    print(str(sum(len(F) for F in Files)) + ' files saved in ' + Save_Dir + ' in ' +
+          str(round(time.time() - Start, 1)) + ' s')
@@ -57,6 +57,21 @@ pf.Draw_Colormap(Image, Extrema=[Max_Thickness, Min_Thickness],
                  Title='Colormap test', Colorbar_Title=u'\micro{}m',
                  Color_Map_Name=Color_Map_Name)
 
+# ------------- Long signal: Plot_Decimated with 10 million points ---------- #
+
+Time = np.arange(10**7)*1e-4  # s
+Signal = np.cumsum(np.random.standard_normal(len(Time)))
+Colors = pf.Get_Color_Map('viridis', 2)/255.
+
+# Plots: only the points visible at the resolution of the axes are drawn, zoom
+# to see the details
+
+plt.figure()
+p = [pf.Plot_Decimated(Time, Signal, '-', color=Colors[0], lw=.5),
+     pf.Plot_Decimated(Time, -Signal, '-', color=Colors[1], lw=.5)]
+pf.Set_Graph(p, Title='Decimation test', X_Label=r'$t$ (s)', Y_Label='signal',
+             Legends_Names=['signal', 'opposite'])
+
 # ------------------------------- Save graphs ------------------------------- #
 
 Figure_List = plt.get_fignums()
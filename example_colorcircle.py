@@ -15,15 +15,18 @@ from math import pi
  default input corresponds to an angle in degrees
  (from 0 (red) to 120 (green) to 240 (blue) to 360 (red))
  if input is NaN, returns black
+ the input can also be an array of angles (any shape): the output is then
+ an array of RGB triplets of shape angle.shape + (3,), computed in one pass
  optional parameters :
  - saturation of the color: sat (between 0 and 1)
  - luminosity of the color : lum (between 0 and 1)
+   sat and lum can also be arrays (broadcast with the angles)
  - exponent affects the color gradient in each sector : colorexp
  - customcolors allows to define the colors used in the circle
 """
 def colorcircle(angle, sat=.95, lum=0, colexp=.75, customcolors=[]):
-    if np.isnan(angle): # black color if NaN value
-        return np.zeros(3)
+    angle = np.asarray(angle, dtype=float)
+    isnan = np.isnan(angle) # black color if NaN value
     # initialisation:
     if len(customcolors)==0: # default is a chromatic RGB circle
         # angle // 60 determine which colors we will have to combine
@@ -38,21 +41,52 @@ def colorcircle(angle, sat=.95, lum=0, colexp=.75, customcolors=[]):
     dcol = np.concatenate((colini[1:], colini[0:1])) - colini
     # angular width of each sector
     width = 360/float(colini.shape[0])
-    # angle value between 0 and 360°
-    angle = angle % 360
+    # angle value between 0 and 360° (0 for NaN, replaced by black at the end)
+    angle = np.where(isnan, 0, angle) % 360
     # get the sector index with angle//width
-    sector = int(angle//width)
+    # (modulo the number of sectors: -1e-20 % 360 gives 360.)
+    sector = (angle//width).astype(int) % colini.shape[0]
 
     # angle % width determines the angular difference in the current sector
     # color using exponent to improve the contrast
     # formula= col1 + (col2-col1)*dangle**colexp
-    RGB = np.array(colini[sector] + dcol[sector]*(angle%width)/float(width))**colexp
+    RGB = np.array(colini[sector] + dcol[sector]*(angle%width)[..., None]/float(width))**colexp
 
     #adjust saturation and luminosity
+    sat = np.asarray(sat, dtype=float)[..., None]
+    lum = np.asarray(lum, dtype=float)[..., None]
     RGB = (sat*RGB) * (1 - lum) + lum * np.ones(3)
+    RGB[np.broadcast_to(isnan, RGB.shape[:-1])] = 0
     return RGB
 
 
+#%%
+"""
+# COLORCIRCLE LOOK-UP TABLE:
+
+ colorcircle_lut returns the colors of 360*k angles (steps of 1/k degree) as
+ uint8 RGB triplets (0-255), and black for NaN as last entry: it is computed
+ once (same optional parameters as colorcircle)
+ colorcircle_uint8 gives the colors of an array of angles (any shape) with
+ this table, for example to color-code the orientation field of a big image:
+ it is only a rounding and an indexing of the table
+"""
+def colorcircle_lut(k=4, sat=.95, lum=0, colexp=.75, customcolors=[]):
+    lut = np.zeros((360*k+1, 3), dtype='uint8') # last entry: NaN, black
+    lut[:-1] = np.rint(255*colorcircle(np.arange(360*k)/float(k), sat=sat, lum=lum,
+                                       colexp=colexp, customcolors=customcolors))
+    return lut
+
+def colorcircle_uint8(angle, lut):
+    angle = np.asarray(angle, dtype=float)
+    N = lut.shape[0]-1 # number of angles in the table
+    isnan = np.isnan(angle)
+    # index of the closest angle of the table
+    index = np.rint(np.where(isnan, 0, angle)*(N/360.)).astype(int) % N
+    index = np.where(isnan, N, index)
+    return lut[index]
+
+
 #plt.close('all')
 #%% example 1 basic use for shades of colors
 #plt.close()
@@ -101,13 +135,13 @@ fig = plt.figure()
 ax = fig.add_subplot(111)
 
 
+# colors of all the wedges at once:
+cols = colorcircle(theta*step, sat=sat, lum=lum,
+                   colexp=colorexp, customcolors = colorarray)
 for t in theta:
-    # color of this wedge:
-    col = colorcircle(theta[t]*step, sat=sat, lum=lum,
-                      colexp=colorexp, customcolors = colorarray)
     # colored wedges
     ax.add_patch(mpatches.Wedge((0, 0), .5, t*step, (t+1)*step,
-                                color=col))
+                                color=cols[t]))
 # NaN value as a dot in the center
 plt.plot(0,0,'o',
          color=colorcircle(float('NaN'), sat=sat, lum=lum,colexp=colorexp))
@@ -128,15 +162,13 @@ plt.show(fig)
 
 angle = 120 # angle of the color to display
 N=40 # size of the image
-img = np.zeros((N+1,N+1,3)) # RGB square image
 s = np.arange(N+1)/float(N)
 l = np.arange(N+1)/float(N)
 fig = plt.figure(figsize=(5,5))
 
-for col, sat in enumerate(s):
-    for row, lum in enumerate(l):
-        # the RGB colors channels defined by colorcircle are between 0 and 1
-        img[row,col,:] = colorcircle(angle, sat=sat, lum=lum)
+# RGB square image: saturation along the columns, luminosity along the rows
+# the RGB colors channels defined by colorcircle are between 0 and 1
+img = colorcircle(angle, sat=s[np.newaxis,:], lum=l[:,np.newaxis])
 
 # converts this image as uint8 and display it
 img = (255*img).astype('uint8')
@@ -160,3 +192,19 @@ _ = plt.yticks(np.arange(0,N+1,N/5),
 
 _ = plt.title('angle = '+str(angle)+'$^\circ$')
 
+#%% example 5: orientation field of an image with the look-up table
+#plt.close()
+
+N = 512 # size of the image
+y, x = np.mgrid[-N/2:N/2, -N/2:N/2]
+pattern = np.sin(np.sqrt(x**2 + 2*y**2)/8.) # image of elliptic rings
+gy, gx = np.gradient(pattern)
+orientation = np.degrees(np.arctan2(gy, gx)) # angle of the gradient
+orientation[np.hypot(gx, gy) < .02] = np.nan # no orientation where it is flat: black
+
+lut = colorcircle_lut(k=4) # 1440 colors, steps of 0.25 degree
+img = colorcircle_uint8(orientation, lut) # (N, N, 3) uint8 image
+fig = plt.figure(figsize=(5,5))
+plt.imshow(img)
+plt.axis('off')
+_ = plt.title('orientation of the gradient')
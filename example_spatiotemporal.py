@@ -7,7 +7,47 @@ import numpy as np  # calcul matriciel et scientifique
 import matplotlib.pyplot as plt  # figure and graphs
 import skimage
 from math import pi
+import functools
+import os
+import tempfile
 import skimage.io, skimage.draw
+import scipy.ndimage
+
+
+#%% Image sequences too large for the memory
+"""
+open_sequence maps an image sequence stored in a single file without loading it in memory
+returns a read-only array (nimg, ny, nx) (or (nimg, ny, nx, ncolor)) read from the disk when needed
+
+- multi-page TIFF: the pages must be uncompressed and contiguous (uses tifffile)
+- raw file (any other extension): shape = (ny, nx) or (ny, nx, ncolor) of one frame
+  and dtype of the px must be given, offset = size of the header of the file (in bytes)
+"""
+def open_sequence(filename, shape=None, dtype='uint8', offset=0):
+    if filename.lower().endswith(('.tif', '.tiff')):
+        import tifffile # only needed for TIFF stacks
+        return tifffile.memmap(filename, mode='r')
+    # number of frames from the size of the file
+    framesize = int(np.prod(shape))*np.dtype(dtype).itemsize
+    nimg = (os.path.getsize(filename) - offset)//framesize
+    return np.memmap(filename, dtype=dtype, mode='r', offset=offset,
+                     shape=(nimg,)+tuple(shape))
+
+"""
+iter_chunks reads an image sequence by chunks of nchunk images and yields (k, chunk)
+with k the index of the first image of the chunk and chunk an array (n<=nchunk, ny, nx[, ncolor])
+
+imgseq can be an image collection (skimage.io.imread_collection: the images of
+the chunk are read), an array or a memory mapped sequence (see open_sequence: the chunk
+is a view, only the px extracted from it are read from the disk)
+"""
+def iter_chunks(imgseq, nchunk=64):
+    nimg = len(imgseq)
+    for k in range(0, nimg, nchunk):
+        if isinstance(imgseq, np.ndarray):
+            yield k, imgseq[k:k+nchunk]
+        else:
+            yield k, np.stack([imgseq[kimg] for kimg in range(k, min(k+nchunk, nimg))])
 
 
 #%% Movie spatio-temporal diagrams ("reslice")
@@ -15,22 +55,155 @@ import skimage.io, skimage.draw
 # reslice takes an image sequence and 2 coordinates to return a reslice
 # i.e. an image showing the time-evolution of the line [x[0],y[0]],[x[1],y[1]]
 dilatet = int (default= 1) sets the number of px displayed for each frame
+x/yslice can also have more than 2 points (polyline, see line_px)
+
+the images are read by chunks of nchunk images (see iter_chunks), so that the
+memory used is set by nchunk and not by the length of the sequence
+out allows to write the result directly in an existing array of the right
+shape, e.g. a file on the disk: np.lib.format.open_memmap('reslice.npy', mode='w+', ...)
 """
-def reslice(imgseq,xslice,yslice, dilatet=1):
+def reslice(imgseq,xslice,yslice, dilatet=1, nchunk=64, out=None):
+    if out is not None:
+        out = [out]
+    return reslice_lines(imgseq, [[xslice, yslice]], dilatet=dilatet,
+                         nchunk=nchunk, out=out)[0]
+
+"""
+line_px returns the px (iy, ix) of the line [x[0],y[0]],[x[1],y[1]] (see skimage.draw.line)
+or of the polyline [x[0],y[0]],[x[1],y[1]],[x[2],y[2]],... (each joint px is kept once)
+"""
+def line_px(xline, yline):
     # rounds and converts to an integer
-    xslice, yslice = np.rint(xslice).astype(int), np.rint(yslice).astype(int)
-    # determines the px to extract from each image: indline=(iy,ix)
-    indline = skimage.draw.line(yslice[0], xslice[0], yslice[1], xslice[1])
-    if len(imgseq[0].shape) ==2: #B&W img
-        resliceimg = np.zeros((len(imgseq)*dilatet, len(indline[0])), dtype='uint8')
-    else: # color img
-        resliceimg = np.zeros((len(imgseq)*dilatet, len(indline[0]),
-                               imgseq[0].shape[2]), dtype='uint8')
-    for kimg in range(len(imgseq)):
-        # extracts the line in each image of imgseq
-        resliceimg[kimg*dilatet:(kimg+1)*dilatet, :] = imgseq[kimg][indline]
-
-    return resliceimg
+    xline, yline = np.rint(xline).astype(int), np.rint(yline).astype(int)
+    iy, ix = [yline[0:1]], [xline[0:1]]
+    for k in range(len(xline)-1):
+        segment = skimage.draw.line(yline[k], xline[k], yline[k+1], xline[k+1])
+        iy.append(segment[0][1:])
+        ix.append(segment[1][1:])
+    return np.concatenate(iy), np.concatenate(ix)
+
+"""
+reslice_lines returns the reslices of several lines: each image is read only once
+and the px of all the lines are extracted together
+(a fan of 100 lines costs about the same time as a single line)
+
+- lines is a list of [xslice, yslice] (lines or polylines, see reslice)
+- dilatet, nchunk: see reslice
+- out allows to give a list of existing arrays to write the results in (see reslice)
+returns the list of the reslices, in the same order as lines
+"""
+def reslice_lines(imgseq, lines, dilatet=1, nchunk=64, out=None):
+    # determines the px to extract from each image for all the lines: (iy,ix)
+    indlines = [line_px(xslice, yslice) for xslice, yslice in lines]
+    iy = np.concatenate([indline[0] for indline in indlines])
+    ix = np.concatenate([indline[1] for indline in indlines])
+    # position of each line in (iy, ix)
+    bounds = np.cumsum([0]+[len(indline[0]) for indline in indlines])
+    if out is None:
+        # same number of colors and same type as the images
+        img0 = np.asarray(imgseq[0])
+        out = [np.zeros((len(imgseq)*dilatet, len(indline[0]))+img0.shape[2:],
+                        dtype=img0.dtype) for indline in indlines]
+    for kimg, chunk in iter_chunks(imgseq, nchunk):
+        # extracts all the lines in each image of the chunk
+        allpx = np.repeat(chunk[:, iy, ix], dilatet, axis=0)
+        for kline, resliceimg in enumerate(out):
+            resliceimg[kimg*dilatet:(kimg+len(chunk))*dilatet] = allpx[:, bounds[kline]:bounds[kline+1]]
+            if isinstance(resliceimg, np.memmap): # write on the disk as we go
+                resliceimg.flush()
+
+    return out
+
+"""
+interp_table returns the px (iy, ix) and the weights needed to interpolate an image
+of size shape=(ny, nx) at the points (y, x) (float coordinates):
+the interpolated values are np.sum(weights*img[iy, ix], axis=0)
+
+- order = 0 (nearest px), 1 (bilinear) or 3 (cubic): same interpolation as
+  scipy.ndimage.map_coordinates(img, [y, x], order=order, mode='mirror')
+  for order = 3, the image has to be prefiltered: scipy.ndimage.spline_filter(img, mode='mirror')
+- the px outside of the image are mirrored (-1 > 1, nx > nx-2)
+"""
+def interp_table(y, x, shape, order=1):
+    tables = []
+    for coord, n in zip((y, x), shape):
+        coord = np.asarray(coord, dtype=float)
+        if order == 0:
+            ind = np.floor(coord+.5).astype(int)[None,:]
+            weights = np.ones(ind.shape)
+        elif order == 1:
+            ind = np.floor(coord).astype(int) + np.arange(2)[:,None]
+            t = coord - ind[0]
+            weights = np.array([1-t, t])
+        elif order == 3:
+            ind = np.floor(coord).astype(int) - 1 + np.arange(4)[:,None]
+            t = coord - ind[1]
+            # cubic B-spline
+            weights = np.array([(1-t)**3, 3*t**3-6*t**2+4, -3*t**3+3*t**2+3*t+1, t**3])/6.
+        else:
+            raise ValueError('interp_table: order must be 0, 1 or 3')
+        # mirror the px outside of the image
+        if n > 1:
+            ind = np.abs(ind) % (2*(n-1))
+            ind = np.where(ind >= n, 2*(n-1)-ind, ind)
+        else:
+            ind = np.zeros_like(ind)
+        tables.append((ind, weights))
+    (iy, wy), (ix, wx) = tables
+    # combine the two directions: (ky*kx, npoints)
+    iy = np.broadcast_to(iy[:,None,:], (len(iy), len(ix), iy.shape[1])).reshape(-1, iy.shape[1])
+    ix = np.broadcast_to(ix[None,:,:], (len(wy), len(ix), ix.shape[1])).reshape(-1, ix.shape[1])
+    weights = (wy[:,None,:]*wx[None,:,:]).reshape(-1, wy.shape[1])
+    return iy, ix, weights
+
+"""
+reslice_interp is a subpixel version of reslice: the points along the line
+[x[0],y[0]],[x[1],y[1]] are regularly spaced (no rounding of the coordinates)
+and the values are interpolated (see interp_table)
+
+- order = 0 (nearest), 1 (bilinear, default) or 3 (cubic)
+- step is the distance between two points along the line (in px)
+- width > 1 averages the values over width parallel lines, spaced by 1 px,
+  centered on the line (anti-aliasing / noise reduction)
+- dilatet, nchunk and out: see reslice
+the interpolation weights are computed once and all the images of a chunk are
+interpolated together; returns a float image (time, position along the line)
+"""
+def reslice_interp(imgseq, xslice, yslice, order=1, width=1, step=1., dilatet=1,
+                   nchunk=64, out=None):
+    x0, y0 = float(xslice[0]), float(yslice[0])
+    length = np.hypot(xslice[1]-x0, yslice[1]-y0)
+    # unit vector along the line
+    if length > 0:
+        ux, uy = (xslice[1]-x0)/length, (yslice[1]-y0)/length
+    else:
+        ux, uy = 1., 0.
+    # points along the line (columns) for each parallel line (rows)
+    s = np.arange(int(np.floor(length/step))+1)*step
+    w = np.arange(width) - (width-1)/2.
+    xpts = x0 + s[None,:]*ux - w[:,None]*uy
+    ypts = y0 + s[None,:]*uy + w[:,None]*ux
+
+    img0 = np.asarray(imgseq[0])
+    iy, ix, weights = interp_table(ypts.ravel(), xpts.ravel(), img0.shape[:2], order=order)
+    # px index in the flattened images and weights with the shape of the extracted px
+    indpx = iy*img0.shape[1] + ix
+    weights = weights.reshape((1,)+weights.shape+(1,)*(img0.ndim-2))
+    if out is None:
+        out = np.zeros((len(imgseq)*dilatet, len(s))+img0.shape[2:])
+    for kimg, chunk in iter_chunks(imgseq, nchunk):
+        if order == 3: # prefilter in x and y only (not in time)
+            chunk = scipy.ndimage.spline_filter1d(chunk, axis=1, mode='mirror', output=float)
+            chunk = scipy.ndimage.spline_filter1d(chunk, axis=2, mode='mirror', output=float)
+        # extracts and interpolates all the points in each image of the chunk
+        values = np.sum(weights*np.reshape(chunk, (len(chunk), -1)+img0.shape[2:])[:, indpx], axis=1)
+        # average of the parallel lines
+        values = values.reshape((len(chunk), width, len(s))+img0.shape[2:]).mean(axis=1)
+        out[kimg*dilatet:(kimg+len(chunk))*dilatet] = np.repeat(values, dilatet, axis=0)
+        if isinstance(out, np.memmap): # write on the disk as we go
+            out.flush()
+
+    return out
 
 """
 display some images of the sequence then calls for "reslice" after defining x/yslice with ginput
@@ -79,6 +252,75 @@ def resliceinput(imgseq, dilatet=1, nfig=1, display=[]):
     return reslice(imgseq,xslice,yslice,dilatet=dilatet), [xslice,yslice]
 
 
+"""
+rot_geometry returns the coordinates of the px used by reslice_rot and radiusimage:
+for each angle, the line from the center to the edge of the image, subsampled
+to get one px per unit of radius
+
+all the angles are computed at once (vectorized version of the Bresenham
+algorithm of skimage.draw.line, which gives exactly the same px) and the result
+is cached: reslicing many sequences taken with the same camera setup
+(same shape, center and angles) only computes the geometry once
+
+parameters:
+- shape = (ymax, xmax) is the shape of one image
+- xcenter, ycenter are the (integer) coordinates of the center
+- Nangle, startangle (in radians) and fullcircle: see reslice_rot
+returns ylines, xlines: arrays of shape (Nangle, dmax+1), = -1 where unasigned
+NB: the arrays are shared between calls (cache) and are thus read-only
+"""
+@functools.lru_cache(maxsize=32)
+def rot_geometry(shape, xcenter, ycenter, Nangle = 10*360, startangle=-pi/2, fullcircle=True):
+    ymax, xmax = shape
+    # max distance in radius (ASSUMING THAT X is the relevent axis)
+    if not(fullcircle):# allows to calculate radius beyond the distance of the center to the lateral side of the image
+        dmax = np.amax([xmax-xcenter, xcenter])-1
+    else:
+        dmax = np.amin([xmax-xcenter, xcenter])-1
+
+    angle = np.arange(Nangle)*2.*pi/Nangle + startangle
+    # set the radius to test if we are in the direction of the upper/lower edges of the image
+    if not(fullcircle):
+        # the distance depends on which side of the image we are (left/right)
+        dtest = np.where(np.cos(angle)<0, xcenter-1, xmax-xcenter-1)
+    else:
+        # only one distance as dmax is never bigger than the distance from edge
+        dtest = dmax*np.ones(Nangle)
+
+    # end of each line:
+    ytest = ycenter + dtest*np.sin(angle)
+    upper, lower = ytest >= ymax-1, ytest <= 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # upper/lower edge of the image: follow the edge
+        yedge = np.where(upper, ymax-1, 0)
+        xedge = np.floor(xcenter + (yedge-ycenter)/np.tan(angle))
+        # inside the image follow a circle with max radius possible
+        yend = np.where(upper | lower, yedge, np.floor(ytest)).astype(int)
+        xend = np.where(upper | lower, xedge,
+                        np.floor(xcenter + dtest*np.cos(angle))).astype(int)
+# TDL: add similar conditions in x if the image is not elongated along x direction?
+
+    # Bresenham lines from the center to (yend, xend): the line has n+1 px,
+    # the step j along the main direction adds m(j) steps in the other one
+    dy, dx = yend-ycenter, xend-xcenter
+    steep = np.abs(dy) > np.abs(dx)
+    dmain = np.where(steep, dy, dx)[:,None]
+    dother = np.where(steep, dx, dy)[:,None]
+    n = np.abs(dmain)
+    # scale using the total distance of the line: px j of the line for radius k
+    nline = np.floor(np.sqrt(dx**2+dy**2)).astype(int)[:,None]
+    k = np.arange(dmax+1)[None,:]
+    j = ((n+1)*k)//np.maximum(nline, 1)
+    m = (2*np.abs(dother)*j + n)//np.maximum(2*n, 1)
+    offmain, offother = np.sign(dmain)*j, np.sign(dother)*m
+    # coordinates of each line (negative if unasigned)
+    ylines = np.where(k < nline, ycenter + np.where(steep[:,None], offmain, offother), -1)
+    xlines = np.where(k < nline, xcenter + np.where(steep[:,None], offother, offmain), -1)
+    ylines.flags.writeable = False
+    xlines.flags.writeable = False
+    return ylines, xlines
+
+
 """
 reslice_rot calculate the radial profile for each image around a given center
 and averages it along the angles in order to extract only one line/image
@@ -96,6 +338,10 @@ parameters:
 NB
  - in this function, the limiting size is set by the x size of the image
  - typical Nangle needed to extract the px at the edge= im.shape[0]/(2*np.arcsin(im.shape[0]*1./im.shape[1]))*2*pi
+ - the px to extract are computed once for a given shape/center/angles (see rot_geometry)
+ - imageseq can also be a sequence too large for the memory, see iter_chunks:
+   nchunk sets the number of images processed at once (default, all the images)
+   out allows to write the result in an existing array (memmap), see reslice
 
  - suggested pre-treatment of the image seq for impact of drops:
 # concatenate image sequence:
@@ -105,83 +351,43 @@ imageseq = np.where(imseq[0]>imageseq[:], imseq[0]-imageseq[:], imageseq[:]-imse
 # remove irrelevent values (noise) (threshold = 8?)
 imageseq[imageseq < threshold] = 1
 """
-def reslice_rot(imageseq, xcenter, ycenter, Nangle = 10*360 , BGcolor=0, startangle=-pi/2, radiusimage=False, fullcircle=True):
+def reslice_rot(imageseq, xcenter, ycenter, Nangle = 10*360 , BGcolor=0, startangle=-pi/2, radiusimage=False, fullcircle=True,
+                nchunk=None, out=None):
     # rounds and converts to an integer
     xcenter, ycenter = np.rint(xcenter).astype(int), np.rint(ycenter).astype(int)
     # image dimensions
-    tmax, ymax, xmax = imageseq.shape
+    tmax = len(imageseq)
+    ymax, xmax = np.shape(imageseq[0])
     if ymax > xmax:
         print('In reslice_rot: y dimension larger than x dimension. Transposed for calculation: untested, verify the result')
-        return reslice_rot(np.transpose(imageseq, axes=[0,2,1]),
-                           xcenter, ycenter,
-                           Nangle = Nangle , BGcolor=BGcolor,
-                           startangle=startangle-pi/2,
-                           radiusimage=radiusimage, fullcircle=fullcircle)
-
-    # max distance in radius (ASSUMING THAT X is the relevent axis)
-    if not(fullcircle):# allows to calculate radius beyond the distance of the center to the lateral side of the image
-        dmax = np.amax([xmax-xcenter, xcenter])-1
+        # px of the transposed images np.transpose(imageseq, axes=[0,2,1]): x and y are swapped
+        xlines, ylines = rot_geometry((xmax, ymax), xcenter, ycenter, Nangle=Nangle,
+                                      startangle=startangle-pi/2, fullcircle=fullcircle)
     else:
-        dmax = np.amin([xmax-xcenter, xcenter])-1
-    # initialisation (useless)
-#    reslice = np.ones((tmax-1,dmax+1))*BGcolor
-#    radiusseq = np.ones((tmax-1,Nangle,dmax+1))*BGcolor
-
-    # initialize line vectors so that they will be negative if unasigned:
-    xlines = - np.ones((Nangle,dmax+1)).astype(int)
-    ylines = - np.ones((Nangle,dmax+1)).astype(int)
-
-    # construct the lines of coordinates to extract px from each angle:
-    for kangle in range(Nangle):
-        angle = kangle*2.*pi/Nangle + startangle
-# set the radius to test if we are in the direction of the upper/lower edges of the image
-        if not(fullcircle):
-        # the distance depends on which side of the image we are
-            if np.cos(angle)<0:
-                dtest = xcenter-1 #left side
-            else:
-                dtest = xmax-xcenter-1 # right side
-        else:
-        # only one distance as dmax is never bigger than the distance from edge
-            dtest = dmax
-
-        # upper edge
-        if ycenter + dtest*np.sin(angle) >= ymax-1:
-            yend = ymax-1
-#            if np.cos(kangle*2*pi/Nangle)>0:
-            xend = np.floor(xcenter + (yend-ycenter)/np.tan(angle)).astype(int)
-        # lower edge of the image
-        elif ycenter +  dtest*np.sin(angle) <= 0 :
-            yend = 0
-            xend = np.floor(xcenter + (yend-ycenter)/np.tan(angle)).astype(int)
-# TDL: add similar conditions in x if the image is not elongated along x direction?
-# pb in previous attempt: need to evaluate simultaneously the conditions on x and y... > use "np.where" instead of "if"?
-        # inside the image follow a circle with max radius possible
+        # coordinates of the px to extract for each angle (cached, see rot_geometry)
+        ylines, xlines = rot_geometry((ymax, xmax), xcenter, ycenter, Nangle=Nangle,
+                                      startangle=startangle, fullcircle=fullcircle)
+    # number of relevent elements for each radius:
+    nb = (ylines>=0).sum(0)
+
+    if nchunk is None: # all the images at once
+        nchunk = tmax
+    for k, chunk in iter_chunks(imageseq, nchunk):
+        # generate the image sequence of the "radial images" (radius,angle)
+        radialseq= np.where(ylines>=0,chunk[:,ylines,xlines],BGcolor)
+        if out is None:
+            out = np.zeros((tmax,)+radialseq.shape[1:] if radiusimage else (tmax, len(nb)),
+                           dtype=radialseq.dtype if radiusimage else float)
+        # provide this matrix if radiusimage== True
+        if radiusimage:
+            out[k:k+len(chunk)] = radialseq
+        # else, average it along the angular dimension:
         else:
-            xend = np.floor(xcenter + dtest*np.cos(angle)).astype(int)
-            yend = np.floor(ycenter + dtest*np.sin(angle)).astype(int)
-
-        # determine which px to extract
-        coords = skimage.draw.line(ycenter, xcenter, yend, xend)
-        # scale using the total distance of the line
-        nline = np.floor(np.sqrt((xend-xcenter)**2+(yend-ycenter)**2)).astype(int)
-        # coordinates of each line
-        ylines[kangle,0:nline] = coords[0][(len(coords[0])*np.arange(nline))/nline]
-        xlines[kangle,0:nline] = coords[1][(len(coords[0])*np.arange(nline))/nline]
-    # generate the image sequence of the "radial images" (radius,angle)
-    radialseq= np.where(ylines>=0,imageseq[:,ylines,xlines],BGcolor)
-    # exit and provide this matrix if radiusimage== True
-    if radiusimage:
-        return radialseq
-
-    # else, average it along the angular dimension:
-    # sum of relevent elements
-    reslice = np.sum(np.where(radialseq!=BGcolor,radialseq,0),axis=1).astype(float)
-    # number of relevent elements as a matrix with the same size:
-    nb = np.matmul(np.ones(tmax).reshape((tmax,1)),
-                   ((ylines>=0).sum(0)).reshape((1,dmax+1)))
-    # return the average:
-    return reslice/nb
+            # sum of relevent elements divided by their number
+            out[k:k+len(chunk)] = np.sum(np.where(radialseq!=BGcolor,radialseq,0),axis=1)/nb
+        if isinstance(out, np.memmap): # write on the disk as we go
+            out.flush()
+    return out
 """
 radiusimage return an image showing the radial evolution around a given center
 in the new image, each row corresponds to an angle, and the column are radii
@@ -202,40 +408,10 @@ def radiusimage(im, xcenter, ycenter, Nangle = 10*360 , dilate=1, BGcolor=0, sta
     # from image dimensions
     ymax, xmax = im.shape
     if ymax > xmax: print('Error: y dimension larger than x dimension. Call the function with transpose(im)')
-    # max distance in the final image
-    dmax = np.amin([xmax-xcenter, xcenter])-1
-#    result = np.ones((Nangle*dilate,dmax+1), dtype='uint8')*BGcolor
-
-    # initialize line vectors so that they will be negative if unasigned:
-    xlines = - np.ones((Nangle,dmax+1)).astype(int)
-    ylines = - np.ones((Nangle,dmax+1)).astype(int)
-
-    # extract the px from each angle:
-    for kangle in range(Nangle):
-        angle = kangle*2.*pi/Nangle + startangle*pi/180
-
-        # upper edge
-        if ycenter + dmax*np.sin(angle) >= ymax-1:
-            yend = ymax-1
-#            if np.cos(kangle*2*pi/Nangle)>0:
-            xend = np.floor(xcenter + (yend-ycenter)/np.tan(angle)).astype(int)
-        # lower edge of the image
-        elif ycenter +  dmax*np.sin(angle) <= 0 :
-            yend = 0
-            xend = np.floor(xcenter + (yend-ycenter)/np.tan(angle)).astype(int)
-# TDL :add similar conditions in x if the image is not elongated along x direction
-        # inside the image follow a circle with max radius possible
-        else:
-            xend = np.floor(xcenter + dmax*np.cos(angle)).astype(int)
-            yend = np.floor(ycenter + dmax*np.sin(angle)).astype(int)
-
-        # determine which px to extract
-        coords = skimage.draw.line(ycenter, xcenter, yend, xend)
-        # scale using the total distance of the line
-        nline = np.floor(np.sqrt((xend-xcenter)**2+(yend-ycenter)**2)).astype(int)
-        # coordinates of each line
-        ylines[kangle,0:nline] = coords[0][(len(coords[0])*np.arange(nline))/nline]
-        xlines[kangle,0:nline] = coords[1][(len(coords[0])*np.arange(nline))/nline]
+
+    # coordinates of the px to extract for each angle (cached, see rot_geometry)
+    ylines, xlines = rot_geometry((ymax, xmax), xcenter, ycenter, Nangle=Nangle,
+                                  startangle=startangle*pi/180, fullcircle=True)
     # generate the image sequence of the "radial images" (radius,angle)
     return np.where(ylines>=0,im[ylines,xlines],BGcolor)
 
@@ -382,3 +558,56 @@ a3.imshow(radial[0:-1:10], cmap='gray')
 a3.set_title('radial evolution on image n.20')
 a3.set_xlabel('radius (px)')
 a3.set_ylabel('angle ($^\circ$)')
+
+#%% example 4: sequences too large for the memory
+# the images are read by chunks of nchunk images: no need to concatenate the sequence
+# (the background substraction of example 3 is skipped here)
+spatiotemporal = reslice_rot(imgseq, xcenter, ycenter, nchunk=10)
+# the result can be written directly in a file (here a temporary file, deleted after):
+tmpfile = tempfile.NamedTemporaryFile(suffix='.npy', delete=False).name
+diagram = np.lib.format.open_memmap(tmpfile, mode='w+', dtype='uint8',
+                                    shape=(len(imgseq), 401))
+reslice(imgseq, [50, 450], [250, 250], nchunk=10, out=diagram)
+del diagram # closes the file before deleting it
+os.remove(tmpfile)
+# a large multi-page TIFF (or raw) file can be used in the same way without loading it:
+#imgseq = open_sequence('stack.tif')
+#imgseq = open_sequence('stack.raw', shape=(ny, nx), dtype='uint16')
+
+plt.figure()
+plt.imshow(spatiotemporal, cmap='gray')
+plt.xlabel('radius (px)')
+plt.ylabel('time (frame)')
+plt.title('radial spatiotemporal (by chunks)')
+
+#%% example 5: many lines at once: fan of lines around the center
+nlines = 100
+theta = np.linspace(0, 2*pi, nlines, endpoint=False)
+radius = 150
+lines = [[[xcenter, xcenter+radius*np.cos(t)], [ycenter, ycenter+radius*np.sin(t)]]
+         for t in theta]
+# each image is read once for all the lines:
+fan = reslice_lines(imgseq, lines)
+# a polyline (here a zigzag) can also be used as a line:
+zigzag = reslice(imgseq, [50, 150, 250, 350, 450], [200, 300, 200, 300, 200])
+
+# the lines do not have the same number of px (diagonals are shorter in px):
+# they are cut to the shortest one before averaging. The px of a line are not evenly
+# spaced in radius (diagonal px are sqrt(2) apart): the x axis is the index of the px
+# along the lines (reslice_interp with step=1 gives evenly spaced points, one line at a time)
+length = min(np.shape(diagram)[1] for diagram in fan)
+plt.figure()
+plt.imshow(np.mean([diagram[:, :length] for diagram in fan], axis=0), cmap='gray')
+plt.xlabel('px index along the line')
+plt.ylabel('time (frame)')
+plt.title('average over '+str(nlines)+' lines')
+
+#%% example 6: subpixel reslice
+# reslice along a line which is not aligned with the px, averaged on 5 px in width
+subpx = reslice_interp(imgseq, [50.3, 450.7], [180.2, 320.6], order=3, width=5)
+
+plt.figure()
+plt.imshow(subpx, cmap='gray')
+plt.xlabel('spatial (px)')
+plt.ylabel('time (frame)')
+plt.title('subpixel spatiotemporal')
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+This script corrects several videos in the same way as the
+Test_Video_Speed_Crop_Whitebalance script, using all the cores of the
+computer: each video is split in ranges of consecutive frames, corrected in
+parallel by different processes (see Correct_Video_Parallel in
+Picture_Functions). The corrected videos are saved next to the original ones
+with the suffix _corrected.
+Because of the processes, the program has to be in the
+if __name__ == '__main__': block, and the script should be run in a new
+console (or with python Batch_Video_Correction.py) rather than in an
+interactive one.
+"""
+
+import os
+import glob
+import time
+import numpy as np
+
+import imageio
+import Picture_Functions as pif
+
+# ------------------------------- Parameters -------------------------------- #
+
+Input_Names = sorted(glob.glob('*.avi'))  # videos to correct
+Suffix = '_corrected'  # added to the name of the corrected videos
+Do_Image_Sequence = False
+N_Processes = None  # number of processes, None for the number of cores
+
+# Times at which you want the new videos to start and end, None for the whole
+# video.
+Start_Time = None  # s
+End_Time = None  # s
+
+# Same corrections as in Test_Video_Speed_Crop_Whitebalance
+Saturation = [0.97, 0.91, 1.]
+Luminence = [0., 0., 0.1]
+Minimum = 0.05
+Maximmum = 0.8
+Crop = [220, 1180, 740, 1860]  # first row, last row, first column, last column
+
+# ------------------------------ Program begin ------------------------------ #
+
+if __name__ == '__main__':
+    LUT = pif.Correction_LUT(Minimum, Maximmum, Saturation, Luminence)
+    Input_Names = [Name for Name in Input_Names if Suffix not in Name]
+
+    for Input_Name in Input_Names:
+        Begin = time.time()
+        Save_Name = os.path.splitext(Input_Name)[0] + Suffix
+
+        # Frames to correct
+        Video_ID = imageio.get_reader(Input_Name, 'ffmpeg')
+        fps = Video_ID.get_meta_data()['fps']
+        N_Frames = Video_ID.count_frames()
+        Video_ID.close()
+        First_Frame_Number = 0 if Start_Time is None else \
+            int(np.floor(Start_Time*fps))
+        Last_Frame_Number = N_Frames if End_Time is None else \
+            min(int(np.ceil(End_Time*fps)), N_Frames)
+        Image_Numbers_to_Get = np.arange(First_Frame_Number, Last_Frame_Number)
+
+        pif.Correct_Video_Parallel(Input_Name, Image_Numbers_to_Get, LUT,
+                                   Save_Name, fps, Crop=Crop,
+                                   Do_Image_Sequence=Do_Image_Sequence,
+                                   N_Processes=N_Processes)
+        print(Input_Name + ': ' + str(len(Image_Numbers_to_Get)) +
+              ' frames corrected in ' + str(round(time.time() - Begin, 1)) +
+              ' s')
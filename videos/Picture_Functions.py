@@ -16,19 +16,90 @@ Then in spyder, in the console:
 """
 
 # Packages
+import os
+import glob
+import time
+import queue
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import numpy as np
+import imageio
+import skimage
 from matplotlib import pyplot as plt
 
+Video_Extensions = ('.avi', '.mp4', '.mov', '.mkv', '.wmv')
 
-def Extrema(Video_ID, Image_Numbers_to_Get):
-    # Return global extrema in R, B and B over the whole video
-    Minima = []
-    Maxima = []
-    for N in Image_Numbers_to_Get:
-        Image = np.array(Video_ID.get_data(N))
-        Minima.append(np.min(Image, axis=(0, 1)))
-        Maxima.append(np.max(Image, axis=(0, 1)))
-    return np.min(Minima, axis=0), np.max(Maxima, axis=0)
+
+def Extrema(Video_ID, Image_Numbers_to_Get, N_Samples=None, Random=False,
+            Percentiles=(0, 100)):
+    """
+    Return global extrema in R, G and B over the whole video (uint8 values).
+    - N_Samples: if given, only this number of frames, regularly spaced in
+      Image_Numbers_to_Get (or randomly chosen if Random is True), are read.
+    - Percentiles: by default (0, 100), the true minima and maxima. Robust
+      extrema, less sensitive to a few saturated or dead pixels, are given
+      for example by (0.5, 99.5).
+    The values are counted in a Color_Histogram, which can also be filled
+    during the correction, see Correct_Video.
+    """
+    Histogram = Color_Histogram()
+    for N in Sample_Frames(Image_Numbers_to_Get, N_Samples, Random=Random):
+        Histogram.Add(np.asarray(Video_ID.get_data(N)))
+    return Histogram.Extrema(*Percentiles)
+
+
+def Sample_Frames(Image_Numbers_to_Get, N_Samples=None, Random=False,
+                  Seed=None):
+    """
+    Return N_Samples frame numbers among Image_Numbers_to_Get, regularly
+    spaced or randomly chosen (Random=True, Seed for reproducibility), in
+    increasing order to read the video forward. Return all the frame numbers
+    if N_Samples is None or larger than their number.
+    """
+    Image_Numbers_to_Get = np.asarray(Image_Numbers_to_Get)
+    if N_Samples is None or N_Samples >= len(Image_Numbers_to_Get):
+        return Image_Numbers_to_Get
+    if Random:
+        Index = np.random.default_rng(Seed).choice(len(Image_Numbers_to_Get),
+                                                   N_Samples, replace=False)
+    else:
+        Index = np.linspace(0, len(Image_Numbers_to_Get) - 1,
+                            N_Samples).astype(int)
+    return Image_Numbers_to_Get[np.sort(Index)]
+
+
+class Color_Histogram:
+    """
+    Histograms of the 256 values of R, G and B of uint8 pictures, filled
+    picture after picture (or batch after batch) with Add, so that the
+    statistics of a whole video only need one pass and a fixed memory.
+    Counts[V, i] is the number of pixels with value V for the color i.
+    """
+
+    def __init__(self, N_Colors=3):
+        self.Counts = np.zeros((256, N_Colors), dtype=np.int64)
+
+    def Add(self, Frames):
+        # Frames: uint8 picture (height, width, 3) or batch (number, ...)
+        for i in range(self.Counts.shape[1]):
+            self.Counts[:, i] += np.bincount(Frames[..., i].ravel(),
+                                             minlength=256)
+
+    def Extrema(self, Low=0, High=100):
+        """
+        Return the Low and High percentiles of each color (uint8 values):
+        Low=0 and High=100 give the true minima and maxima.
+        """
+        Total = self.Counts.sum(axis=0)
+        Below = np.cumsum(self.Counts, axis=0)  # values <= V
+        Above = Total - Below + self.Counts  # values >= V
+        # first value with more than Low % of the pixels below or at it
+        Minima = np.argmax(Below > Low/100.*Total, axis=0)
+        # last value with more than (100-High) % of the pixels above or at it
+        Maxima = 255 - np.argmax((Above > (100 - High)/100.*Total)[::-1],
+                                 axis=0)
+        return Minima.astype(np.uint8), Maxima.astype(np.uint8)
 
 
 def Improve_Contrast(Image, Min, Max):
@@ -77,6 +148,244 @@ def White_Balance(Image, Saturation, Luminence):
     return Image
 
 
+class Color_LUT:
+    """
+    Look-up table (LUT) of a color correction of uint8 pictures.
+    All the functions of this file change each pixel according to its value
+    only: for uint8 pictures, a correction (or a chain of corrections) is
+    entirely defined by the 256 values it gives for each color. Table is
+    this (256, 3) uint8 array: the corrected value of the value V of the
+    color i is Table[V, i].
+    A LUT is built from a chain of functions with From_Functions, applied
+    directly on uint8 pictures with Apply (one np.take per color, no float
+    conversion), and saved with Save to apply the same correction to other
+    videos with Color_LUT.Load.
+    """
+
+    def __init__(self, Table=None, Description=''):
+        if Table is None:  # identity, no correction
+            Table = np.tile(np.arange(256, dtype=np.uint8).reshape(256, 1),
+                            (1, 3))
+        self.Table = np.asarray(Table, dtype=np.uint8)
+        self.Description = Description
+
+    @classmethod
+    def From_Functions(cls, Functions):
+        """
+        Functions is a list of the corrections to apply, in order, given as
+        tuples (function, arguments...), e.g.:
+            [(Improve_Contrast, 0.05, 0.8), (White_Balance, [0.97, 0.91, 1.],
+                                            [0., 0., 0.1])]
+        The functions take a picture between 0 and 1 and return a picture
+        between 0 and 1, as the functions of this file.
+        """
+        Ramp = np.tile((np.arange(256)/255.).reshape(256, 1, 1), (1, 1, 3))
+        Description = []
+        for Function, *Arguments in Functions:
+            Ramp = Function(Ramp, *Arguments)
+            Description.append(Function.__name__ + str(tuple(Arguments)))
+        return cls(skimage.img_as_ubyte(np.clip(Ramp[:, 0, :], 0, 1)),
+                   ' > '.join(Description))
+
+    def Apply(self, Frames, Output=None):
+        """
+        Corrects a uint8 picture (height, width, 3) or a batch of pictures
+        (number, height, width, 3). Output is an optional uint8 array with the
+        same shape to write the result in.
+        """
+        if Output is None:
+            Output = np.empty(Frames.shape, dtype=np.uint8)
+        for i in range(self.Table.shape[1]):
+            np.take(self.Table[:, i], Frames[..., i], out=Output[..., i])
+        return Output
+
+    def Then(self, Other):
+        # Returns the LUT of this correction followed by the Other one. The
+        # intermediate uint8 rounding may differ by 1 from From_Functions.
+        Table = np.stack([Other.Table[self.Table[:, i], i]
+                          for i in range(self.Table.shape[1])], axis=1)
+        return Color_LUT(Table, self.Description + ' > ' + Other.Description)
+
+    def Save(self, File_Name):
+        # Saves the LUT in a .npz file
+        np.savez(File_Name, Table=self.Table, Description=self.Description)
+
+    @classmethod
+    def Load(cls, File_Name):
+        if not File_Name.endswith('.npz'):
+            File_Name += '.npz'
+        with np.load(File_Name) as Data:
+            return cls(Data['Table'], str(Data['Description']))
+
+
+def Correction_LUT(Minimum, Maximum, Saturation, Luminence):
+    """
+    Returns the Color_LUT of the usual correction of the scripts:
+    Improve_Contrast (or Improve_Contrast_Colors if Minimum and Maximum are
+    given for each color) and then White_Balance.
+    Minimum and Maximum are between 0 and 1, as in the scripts.
+    Use it with Correct_Frames.
+    """
+    if np.size(Minimum) == 1 and np.size(Maximum) == 1:
+        Contrast = (Improve_Contrast, Minimum, Maximum)
+    else:
+        Contrast = (Improve_Contrast_Colors, Minimum, Maximum)
+    return Color_LUT.From_Functions([Contrast, (White_Balance, Saturation,
+                                                Luminence)])
+
+
+def Correct_Frames(Frames, LUT, Crop=None, Output=None):
+    """
+    Crops and corrects colors of a picture or a batch of pictures in a single
+    pass, without float conversion: each uint8 value is replaced by its
+    corrected value in the Color_LUT, given for example by Correction_LUT.
+    Inputs:
+    - Frames is a uint8 array (height, width, 3) or (number, height, width, 3)
+    - Crop = [first row, last row, first column, last column], or None
+    - Output is an optional array with the final shape to write the result
+      in, to avoid allocating a new array for each batch.
+    """
+    if Crop is not None:
+        Frames = Frames[..., Crop[0]:Crop[1], Crop[2]:Crop[3], :]
+    return LUT.Apply(Frames, Output=Output)
+
+
+def Correct_Video(Video_ID, Image_Numbers_to_Get, LUT, Crop=None,
+                  Batch_Size=32, Histogram=None):
+    """
+    Reads, crops and corrects the frames of a video by batches (see
+    Correct_Frames). It yields for each batch the frame numbers and the
+    corrected frames as a (number, height, width, 3) uint8 array, that you
+    can write in a new video or an image sequence.
+    Video_ID is an imageio reader (or a Prefetch_Reader).
+    The batch array is reused for the next batch: copy it if you keep it.
+    Histogram is an optional Color_Histogram in which the cropped frames,
+    before correction, are counted: the statistics of the video are obtained
+    during the correction, without another reading of the video.
+    """
+    Buffer = None
+    Output = None
+    for k in range(0, len(Image_Numbers_to_Get), Batch_Size):
+        Numbers = Image_Numbers_to_Get[k:k + Batch_Size]
+        for i, N in enumerate(Numbers):
+            # each frame is cropped before being copied in the batch: the
+            # full frames are never stacked
+            Frame = np.asarray(Video_ID.get_data(N))
+            if Crop is not None:
+                Frame = Frame[Crop[0]:Crop[1], Crop[2]:Crop[3]]
+            if Buffer is None:
+                Buffer = np.empty((Batch_Size,) + Frame.shape, dtype=np.uint8)
+            Buffer[i] = Frame
+        Frames = Buffer[:len(Numbers)]
+        if Histogram is not None:
+            Histogram.Add(Frames)
+        if Output is None or len(Output) != len(Frames):
+            Output = np.empty(Frames.shape, dtype=np.uint8)
+        yield Numbers, Correct_Frames(Frames, LUT, Output=Output)
+
+
+def Correct_Video_Shard(Input_Name, Image_Numbers, LUT, Segment_Name, fps,
+                        Crop=None, Sequence_Name=None, First_Number=0,
+                        Batch_Size=32):
+    """
+    Corrects the frames Image_Numbers of the video Input_Name with its own
+    reader and writes them in the video Segment_Name (if not None) and as
+    JPEG images in the directory Sequence_Name (if not None), numbered from
+    their position in the whole sequence (N - First_Number). It is one
+    worker of Correct_Video_Parallel and returns the Color_Histogram of the
+    cropped input frames.
+    """
+    Histogram = Color_Histogram()
+    Video_ID = imageio.get_reader(Input_Name, 'ffmpeg')
+    if Segment_Name is not None:
+        Video_Writer = Background_Writer(imageio.get_writer(Segment_Name,
+                                                            fps=fps))
+    if Sequence_Name is not None:
+        Image_Writer = Background_Writer()
+    for Numbers, Images in Correct_Video(Video_ID, Image_Numbers, LUT,
+                                         Crop=Crop, Batch_Size=Batch_Size,
+                                         Histogram=Histogram):
+        for N, Image in zip(Numbers, Images):
+            if Segment_Name is not None:
+                Video_Writer.append_data(Image)
+            if Sequence_Name is not None:
+                Image_Writer.imwrite(Sequence_Name + '/image-' +
+                                     str(N - First_Number) + '.jpg', Image)
+    if Segment_Name is not None:
+        Video_Writer.close()
+    if Sequence_Name is not None:
+        Image_Writer.close()
+    Video_ID.close()
+    return Histogram
+
+
+def Concatenate_Videos(Segment_Names, Save_Name):
+    """
+    Concatenates videos encoded with the same parameters (the segments of
+    Correct_Video_Parallel) in the video Save_Name, without re-encoding them
+    (ffmpeg concat demuxer).
+    """
+    import imageio_ffmpeg  # installed with the ffmpeg plugin of imageio
+    List_Name = Save_Name + '_segments.txt'
+    with open(List_Name, 'w') as List_File:
+        for Segment_Name in Segment_Names:
+            List_File.write("file '" + os.path.abspath(Segment_Name) + "'\n")
+    subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel',
+                    'error', '-f', 'concat', '-safe', '0', '-i', List_Name,
+                    '-c', 'copy', Save_Name], check=True)
+    os.remove(List_Name)
+
+
+def Correct_Video_Parallel(Input_Name, Image_Numbers_to_Get, LUT, Save_Name,
+                           fps, Crop=None, Do_Video=True,
+                           Do_Image_Sequence=False, N_Processes=None,
+                           Batch_Size=32):
+    """
+    Same correction as Correct_Video, but the frames are split in
+    N_Processes (number of cores by default) ranges of consecutive frames,
+    corrected in parallel, each one by a process with its own video reader.
+    Each process writes its part of the video, the parts are then
+    concatenated in order in Save_Name + '.avi' (if Do_Video). The images of
+    the image sequence (if Do_Image_Sequence) are written in parallel in the
+    directory Save_Name.
+    Returns the Color_Histogram of the cropped input frames.
+    Because of the processes, the script calling this function has to
+    protect its main part with if __name__ == '__main__':, see
+    Batch_Video_Correction script.
+    """
+    if len(Image_Numbers_to_Get) == 0:
+        return Color_Histogram()
+    if N_Processes is None:
+        N_Processes = os.cpu_count()
+    Shards = [Shard for Shard in np.array_split(Image_Numbers_to_Get,
+                                                N_Processes) if len(Shard)]
+    if Do_Image_Sequence and not os.path.isdir(Save_Name):
+        os.mkdir(Save_Name)
+    Sequence_Name = Save_Name if Do_Image_Sequence else None
+    if not Do_Video:
+        Segment_Names = [None]*len(Shards)
+    elif len(Shards) == 1:
+        Segment_Names = [Save_Name + '.avi']
+    else:
+        Segment_Names = [Save_Name + '_part' + str(k) + '.avi'
+                         for k in range(len(Shards))]
+
+    with ProcessPoolExecutor(len(Shards)) as Pool:
+        Futures = [Pool.submit(Correct_Video_Shard, Input_Name, Shard, LUT,
+                               Segment_Name, fps, Crop, Sequence_Name,
+                               Image_Numbers_to_Get[0], Batch_Size)
+                   for Shard, Segment_Name in zip(Shards, Segment_Names)]
+        Histogram = Color_Histogram()
+        for Future in Futures:
+            Histogram.Counts += Future.result().Counts
+
+    if Do_Video and len(Shards) > 1:
+        Concatenate_Videos(Segment_Names, Save_Name + '.avi')
+        for Segment_Name in Segment_Names:
+            os.remove(Segment_Name)
+    return Histogram
+
+
 def White_Balance_Auto(Image):
     """
     The function corrects the white balance of a picture by measuring the
@@ -143,3 +452,225 @@ def White_Balance_Auto(Image):
     plt.show()
 
     return(Saturation, Luminence)
+
+
+# Readers of the video files, one per thread or process (see Read_Video_Frame)
+Video_Readers = threading.local()
+
+
+def Read_Image_File(File_Name):
+    # Return the picture of an image file (TIFF, PNG, JPEG...)
+    return np.asarray(imageio.imread(File_Name))
+
+
+def Read_Video_Frame(Video_Name, N):
+    """
+    Return the frame N of a video. Video readers cannot be shared between
+    threads, so each thread (or process) opens its own reader the first time
+    and keeps it for the next frames.
+    """
+    if not hasattr(Video_Readers, 'Readers'):
+        Video_Readers.Readers = {}
+    if Video_Name not in Video_Readers.Readers:
+        Video_Readers.Readers[Video_Name] = imageio.get_reader(Video_Name,
+                                                               'ffmpeg')
+    return np.asarray(Video_Readers.Readers[Video_Name].get_data(N))
+
+
+class Prefetch_Reader:
+    """
+    Frame source which decodes the frames in advance, in parallel, on a pool
+    of threads (or processes). When the frame N is asked, the following
+    frames, up to N + Read_Ahead, are decoded in the background, so that
+    reading a sequence in order is limited by the number of cores and not by
+    the decoding time of one frame.
+    It can replace the image collections of skimage.io.imread_collection and
+    the video readers of imageio.get_reader: it has a length, frames are given
+    by Reader[N] or Reader.get_data(N), and it can be iterated.
+    Inputs:
+    - Source: pattern of the image files ('img*.tif'), list of image files or
+      name of a video file (its frames are decoded in order by one thread).
+    - N_Workers: number of threads or processes, number of cores by default.
+    - Read_Ahead: number of frames decoded in advance, 2*N_Workers by default.
+      It bounds the memory used by the reader.
+    - Processes: if True, uses processes instead of threads, useful when the
+      decoding does not release the GIL.
+    Exemple:
+        Image_Sequence = pif.Prefetch_Reader(path + '/img*.tif')
+        spatiotemporal = reslice(Image_Sequence, xslice, yslice)
+    """
+
+    def __init__(self, Source, N_Workers=None, Read_Ahead=None,
+                 Processes=False):
+        if N_Workers is None:
+            N_Workers = os.cpu_count()
+        if Read_Ahead is None:
+            Read_Ahead = 2*N_Workers
+        self.Read_Ahead = Read_Ahead
+        self.Video_Name = None
+        if isinstance(Source, str) and \
+                Source.lower().endswith(Video_Extensions):
+            self.Video_Name = Source
+            Reader = imageio.get_reader(Source, 'ffmpeg')
+            self.Meta_Data = Reader.get_meta_data()
+            self.N_Frames = Reader.count_frames()
+            Reader.close()
+            # ffmpeg decodes videos in order (and with its own threads):
+            # one thread reading the next frames avoids seeking for each one
+            N_Workers = 1
+        else:
+            if isinstance(Source, str):
+                Source = sorted(glob.glob(Source))
+            self.Files = list(Source)
+            self.Meta_Data = {}
+            self.N_Frames = len(self.Files)
+        if Processes:
+            self.Pool = ProcessPoolExecutor(N_Workers)
+        else:
+            self.Pool = ThreadPoolExecutor(N_Workers)
+        self.Futures = {}  # frames being decoded, bounded by Read_Ahead
+
+    def Submit(self, N):
+        if N not in self.Futures:
+            if self.Video_Name is None:
+                self.Futures[N] = self.Pool.submit(Read_Image_File,
+                                                   self.Files[N])
+            else:
+                self.Futures[N] = self.Pool.submit(Read_Video_Frame,
+                                                   self.Video_Name, N)
+
+    def get_data(self, N):
+        N = int(N)
+        if N < 0:
+            N += self.N_Frames
+        if not 0 <= N < self.N_Frames:
+            raise IndexError('Frame ' + str(N) + ' out of range')
+        # Frames which will not be read anymore (random access) are dropped
+        for M in list(self.Futures):
+            if M < N or M > N + self.Read_Ahead:
+                self.Futures.pop(M).cancel()
+        self.Submit(N)
+        for M in range(N + 1, min(N + 1 + self.Read_Ahead, self.N_Frames)):
+            self.Submit(M)
+        return self.Futures.pop(N).result()
+
+    def get_meta_data(self):
+        return self.Meta_Data
+
+    def __getitem__(self, N):
+        return self.get_data(N)
+
+    def __len__(self):
+        return self.N_Frames
+
+    def __iter__(self):
+        for N in range(self.N_Frames):
+            yield self.get_data(N)
+
+    def close(self):
+        for Future in self.Futures.values():
+            Future.cancel()
+        self.Futures = {}
+        self.Pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Background_Writer:
+    """
+    Writes pictures in background threads, so that the correction of the
+    next frames does not wait for the encoding and the disk. The pictures are
+    put in a queue of Queue_Size pictures: when it is full, the program waits
+    for the writers, which bounds the memory used.
+    - Background_Writer(Video_Writer) replaces an imageio writer: use
+      append_data and close as usual. The frames are appended in order by
+      one thread.
+    - Background_Writer(N_Threads=2) writes image files with imageio in
+      N_Threads threads: use imwrite(File_Name, Image) instead of
+      imageio.imwrite.
+    The pictures are copied when they are put in the queue, the arrays can
+    be reused for the next frames.
+    Statistics tells if the disk (or the encoding) is the limit: if the time
+    spent waiting for a place in the queue is large, the writing is slower
+    than the correction.
+    """
+
+    def __init__(self, Video_Writer=None, N_Threads=2, Queue_Size=16):
+        self.Video_Writer = Video_Writer
+        if Video_Writer is not None:
+            N_Threads = 1  # frames of a video are appended in order
+        self.Queue = queue.Queue(Queue_Size)
+        self.Lock = threading.Lock()
+        self.Error = None
+        # Statistics
+        self.N_Written = 0
+        self.N_Waits = 0  # number of pictures which waited for the queue
+        self.Wait_Time = 0.  # time spent waiting for the queue
+        self.Write_Time = 0.  # time spent by the threads to write
+        self.Max_Queue = 0
+        self.Threads = [threading.Thread(target=self.Work, daemon=True)
+                        for k in range(N_Threads)]
+        for Thread in self.Threads:
+            Thread.start()
+
+    def Work(self):
+        while True:
+            Task = self.Queue.get()
+            if Task is None:  # end of the writing
+                break
+            if self.Error is not None:
+                # after an error, the pictures left in the queue are not
+                # written: a video would silently miss a frame
+                continue
+            Function, Arguments = Task
+            Begin = time.time()
+            try:
+                Function(*Arguments)
+            except Exception as Error:
+                self.Error = Error
+            with self.Lock:
+                self.Write_Time += time.time() - Begin
+                self.N_Written += 1
+
+    def Put(self, Function, *Arguments):
+        if self.Error is not None:
+            raise self.Error
+        if self.Queue.full():
+            self.N_Waits += 1
+        Begin = time.time()
+        self.Queue.put((Function, Arguments))
+        self.Wait_Time += time.time() - Begin
+        self.Max_Queue = max(self.Max_Queue, self.Queue.qsize())
+
+    def append_data(self, Image):
+        self.Put(self.Video_Writer.append_data, np.array(Image))
+
+    def imwrite(self, File_Name, Image):
+        self.Put(imageio.imwrite, File_Name, np.array(Image))
+
+    def Statistics(self):
+        return {'Written': self.N_Written, 'Waits': self.N_Waits,
+                'Wait_Time': self.Wait_Time, 'Write_Time': self.Write_Time,
+                'Max_Queue': self.Max_Queue,
+                'Queue_Size': self.Queue.maxsize}
+
+    def close(self):
+        # Waits for the end of the writing
+        for Thread in self.Threads:
+            self.Queue.put(None)
+        for Thread in self.Threads:
+            Thread.join()
+        if self.Video_Writer is not None:
+            self.Video_Writer.close()
+        if self.Error is not None:
+            raise self.Error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
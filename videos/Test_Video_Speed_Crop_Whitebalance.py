@@ -16,7 +16,6 @@ import os
 import numpy as np
 
 import imageio
-import skimage
 import Picture_Functions as pif
 
 # ------------------------------- Parameters -------------------------------- #
@@ -65,6 +64,11 @@ Maximmum = 0.8
 # Framing
 Crop = [220, 1180, 740, 1860]  # first row, last row, first column, last column
 
+# Number of frames read and corrected together
+Batch_Size = 32
+# Number of threads writing the image sequence, in background
+N_Writing_Threads = 2
+
 # ------------------------------ Program begin ------------------------------ #
 
 # Preparation of video reader and writer
@@ -81,36 +85,60 @@ Last_Frame_Number = np.int(np.ceil(End_Time*Input_fps))
 Image_Numbers_to_Get = np.arange(Fisrt_Frame_Number, Last_Frame_Number,
                                  One_Over)
 
-# Opening of the video writer with the right fps
-Video_Writer = imageio.get_writer(Save_Name + '.avi', fps=Output_fps)
+# Opening of the video writer with the right fps, the frames are encoded and
+# written in background
+Video_Writer = pif.Background_Writer(imageio.get_writer(Save_Name + '.avi',
+                                                        fps=Output_fps))
 
 # Creation of the directory for the image sequence
 if Do_Image_Sequence and not os.path.isdir(Save_Name):
     os.mkdir(Save_Name)
+if Do_Image_Sequence:
+    Image_Writer = pif.Background_Writer(N_Threads=N_Writing_Threads)
 
 # ---- Loop over the pictures to correct them save them in the new video ---- #
 
-for N in Image_Numbers_to_Get:
-    """
-    Load the image from the video reader and convert the uint8 values to [0-1]
-    value.
-    """
+"""
+Contrast and white balance corrections only depend on the uint8 value of
+each pixel, they are computed once for the 256 possible values in a look-up
+table. The frames are then corrected by batches without conversion to float.
+This is equivalent to the following lines for each frame:
     Image = np.array(Video_ID.get_data(N))/255.
-    # Crop
     Image = Image[Crop[0]:Crop[1], Crop[2]:Crop[3], :]
-    # Improving contrast
     Image = pif.Improve_Contrast(Image, Minimum, Maximmum)
-    # Correct white balance
     Image = pif.White_Balance(Image, Saturation, Luminence)
-    # Convert the [0-1] values back to uint8.
     Image = skimage.img_as_ubyte(Image)
-    # Write the new image in the new video
-    Video_Writer.append_data(Image)
-    # Save the image in the image sequence if asked
-    if Do_Image_Sequence:
-        imageio.imwrite(Save_Name + '/image-' + str(N-Image_Numbers_to_Get[0])
-                        + '.jpg', Image)
+"""
+LUT = pif.Correction_LUT(Minimum, Maximmum, Saturation, Luminence)
+# The correction is saved to apply it to other videos: pif.Color_LUT.Load
+LUT.Save(Save_Name + '_LUT')
+
+# Statistics of the input frames, counted during the correction
+Histogram = pif.Color_Histogram()
+
+for Numbers, Images in pif.Correct_Video(Video_ID, Image_Numbers_to_Get, LUT,
+                                         Crop=Crop, Batch_Size=Batch_Size,
+                                         Histogram=Histogram):
+    for N, Image in zip(Numbers, Images):
+        # Write the new image in the new video
+        Video_Writer.append_data(Image)
+        # Save the image in the image sequence if asked
+        if Do_Image_Sequence:
+            Image_Writer.imwrite(Save_Name + '/image-' +
+                                 str(N-Image_Numbers_to_Get[0]) + '.jpg', Image)
 
 # Closing of the video writer and reader
 Video_Writer.close()
 Video_ID.close()
+
+# If the correction waited a long time for the writers, the disk (or the
+# encoding) is the limit
+print('Video writer: ' + str(Video_Writer.Statistics()))
+if Do_Image_Sequence:
+    Image_Writer.close()
+    print('Image sequence writer: ' + str(Image_Writer.Statistics()))
+
+# Robust extrema of the cropped input, to help choosing Minimum and Maximmum
+Minima, Maxima = Histogram.Extrema(0.5, 99.5)
+print('0.5% and 99.5% percentiles of R, G, B: ' + str(Minima/255.) + ', ' +
+      str(Maxima/255.))